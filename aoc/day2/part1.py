@@ -85,6 +85,7 @@ position 0 after the program halts?
 """
 import pathlib
 
+from aoc.util.cache import ResultCache
 from aoc.util.helpers import timer
 from aoc.util.intcode import IntcodeOperator
 
@@ -97,7 +98,7 @@ def reproduce_1202():
     array = [int(x) for x in INPUT1.read_text().split(",")]
     array[1] = 12
     array[2] = 2
-    computer = IntcodeOperator.from_iter(array)
+    computer = IntcodeOperator.from_iter(array, cache=ResultCache.from_env())
     return [*computer.run(debug=True)][-1]
 
 
@@ -56,23 +56,37 @@ import pathlib
 
 from aoc.util.helpers import timer
 from aoc.util.intcode import IntcodeOperator
+from aoc.util.symbolic import Poly, SymbolicDependence, solve
 
 DIR = pathlib.Path(__file__).parent
 INPUT1: pathlib.Path = DIR / "input1.txt"
 
 
-@timer
-def locate_instruction(target: int):
-    program = IntcodeOperator.from_str(INPUT1.read_text())
-    for n in range(100):
-        for v in range(100):
-            program.array[1] = n
-            program.array[2] = v
-            res = [*program.run(debug=True)][-1]
+def search(program: IntcodeOperator, target: int, size: int = 100):
+    for n in range(size):
+        for v in range(size):
+            res = [*program.run(patch={1: n, 2: v}, debug=True)][-1]
             if res[0] == target:
                 return (100 * n) + v
 
 
+@timer
+def locate_instruction(target: int, size: int = 100):
+    program = IntcodeOperator.from_str(INPUT1.read_text())
+    bounds = {"noun": range(size), "verb": range(size)}
+    # Work out the value at address 0 in terms of the noun and verb and invert it,
+    # unless it depends on them in some other way, in which case try every pair.
+    try:
+        value = program.symbolic({1: "noun", 2: "verb"}).memory[0]
+    except SymbolicDependence:
+        return search(program, target, size)
+    if isinstance(value, Poly) and not set(value.variables) <= set(bounds):
+        return search(program, target, size)
+    solution = solve(value, target, bounds)
+    if solution is not None:
+        return (100 * solution["noun"]) + solution["verb"]
+
+
 if __name__ == "__main__":
     target = 19690720
     instruction = locate_instruction(target)
@@ -106,6 +106,7 @@ tests, what diagnostic code does the program produce?
 """
 import pathlib
 
+from aoc.util.cache import ResultCache
 from aoc.util.helpers import timer
 from aoc.util.intcode import IntcodeOperator
 
@@ -115,7 +116,9 @@ INPUT1: pathlib.Path = DIR / "input1.txt"
 
 @timer
 def solve():
-    operator = IntcodeOperator.from_str(INPUT1.read_text())
+    operator = IntcodeOperator.from_str(
+        INPUT1.read_text(), cache=ResultCache.from_env()
+    )
     output = [*operator.run(1)]
     return output[-1]
 
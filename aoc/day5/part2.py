@@ -76,6 +76,7 @@ What is the diagnostic code for system ID 5?
 """
 import pathlib
 
+from aoc.util.cache import ResultCache
 from aoc.util.helpers import timer
 from aoc.util.intcode import IntcodeOperator
 from aoc.day5.part1 import INPUT1
@@ -83,7 +84,9 @@ from aoc.day5.part1 import INPUT1
 
 @timer
 def solve():
-    operator = IntcodeOperator.from_str(INPUT1.read_text())
+    operator = IntcodeOperator.from_str(
+        INPUT1.read_text(), cache=ResultCache.from_env()
+    )
     output = [*operator.run(5)]
     return output[-1]
 
@@ -85,28 +85,56 @@ Try every combination of phase settings on the amplifiers.
 What is the highest signal that can be sent to the thrusters?
 """
 import pathlib
-from itertools import permutations
-from typing import Iterator
+from typing import Dict, Iterator, Sequence, Tuple
 
+from aoc.util.cache import ResultCache
 from aoc.util.helpers import timer
 from aoc.util.intcode import IntcodeOperator
+from aoc.util.ports import Last
 
 DIR = pathlib.Path(__file__).parent
 INPUT1: pathlib.Path = DIR / "input1.txt"
 
 
-def stream_outs(program: IntcodeOperator, *, n: int = 5) -> Iterator[int]:
-    for mut in permutations(range(n)):
-        out: int = 0
-        for p in mut:
-            res = [*program.run(out, p)]
-            yield res[-1]
-            out = res[-1]
+def stream_outs(
+    program: IntcodeOperator,
+    *,
+    n: int = 5,
+    phases: Sequence[int] = None,
+    signal: int = 0,
+) -> Iterator[int]:
+    """Yield the final signal for every ordering of ``n`` amplifiers' phases.
+
+    Phases are drawn from ``phases`` (``range(n)`` by default), in the same order as
+    :py:func:`itertools.permutations`. An amplifier's output only depends on its phase
+    and input signal, so each distinct pair is only run once, and the orderings are
+    walked as a prefix tree so that those which share a prefix share its signals.
+    """
+    phases = range(n) if phases is None else phases
+    outputs: Dict[Tuple[int, int], int] = {}
+
+    def amplify(phase: int, signal: int) -> int:
+        key = (phase, signal)
+        if key not in outputs:
+            outputs[key] = program.drain(Last(), phase, signal).value
+        return outputs[key]
+
+    def walk(signal: int, remaining: Tuple[int, ...], depth: int) -> Iterator[int]:
+        if depth == n:
+            yield signal
+            return
+        for i, phase in enumerate(remaining):
+            rest = remaining[:i] + remaining[i + 1 :]
+            yield from walk(amplify(phase, signal), rest, depth + 1)
+
+    yield from walk(signal, tuple(phases), 0)
 
 
 @timer
 def solve():
-    program = IntcodeOperator.from_str(INPUT1.read_text().strip())
+    program = IntcodeOperator.from_str(
+        INPUT1.read_text().strip(), cache=ResultCache.from_env()
+    )
     return max(stream_outs(program))
 
 
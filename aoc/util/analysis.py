@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""Static analysis of Intcode programs.
+
+A program image is disassembled by recursive descent from its entry points into
+basic blocks, which are linked into a control-flow graph by fall-through and the
+targets of JIT/JIF. Only immediate targets can be followed statically; a jump through
+memory or the relative base is recorded as dynamic, as is a write through the
+relative base, since either may land anywhere.
+
+The resulting :py:class:`Analysis` says which addresses are code and which are data,
+and whether the program may write into its own code, which is what decides whether
+fast paths that assume fixed code (such as per-address decoding or compilation) are
+safe to enable.
+"""
+import dataclasses
+import json
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from aoc.util.intcode import JUMP, Decoded, OpCode, ParamMode, decode
+from aoc.util.memory import Memory
+
+
+@dataclasses.dataclass(frozen=True)
+class Step:
+    """A single decoded instruction at ``ip`` along with its raw parameters."""
+
+    ip: int
+    ins: Decoded
+    params: Tuple[int, ...]
+
+    @property
+    def end(self) -> int:
+        return self.ip + self.ins.size
+
+    @property
+    def destination(self) -> Optional[int]:
+        """The address this instruction writes to, if it's known statically."""
+        if not self.ins.target or self.ins.modes[self.ins.target - 1] == ParamMode.REL:
+            return None
+        return self.params[self.ins.target - 1]
+
+    def __str__(self) -> str:
+        args = []
+        for i, (mode, param) in enumerate(zip(self.ins.modes, self.params), start=1):
+            if mode == ParamMode.IMM and i != self.ins.target:
+                args.append(f"{param}")
+            elif mode == ParamMode.REL:
+                args.append(f"[base{param:+d}]")
+            else:
+                args.append(f"[{param}]")
+        return f"{self.ip:>6}: {self.ins.code.name:<4} {' '.join(args)}".rstrip()
+
+
+@dataclasses.dataclass(frozen=True)
+class Block:
+    """A basic block: straight-line code, entered only at ``start``.
+
+    ``successors`` holds every statically known address control may pass to on
+    exit. ``dynamic`` is True if the block ends in a jump whose target is only known
+    at runtime, and ``halts`` if it ends by halting. ``invalid`` is the address of
+    the word it runs into if that isn't a valid instruction (as it may be before the
+    program patches it).
+    """
+
+    start: int
+    steps: Tuple[Step, ...]
+    successors: Tuple[int, ...]
+    dynamic: bool = False
+    halts: bool = False
+    invalid: Optional[int] = None
+
+    @property
+    def end(self) -> int:
+        return self.steps[-1].end if self.steps else self.start
+
+
+@dataclasses.dataclass
+class Analysis:
+    """The control-flow graph of a program and what it reveals about its code.
+
+    ``code`` holds the addresses of every instruction and parameter reached, and
+    ``invalid`` those reached which don't hold a valid instruction. ``writes`` maps
+    each instruction which writes to memory to its target address, or ``None`` if the
+    target depends on the relative base. ``modifies`` holds those which may write
+    into code, including any invalid word which is reached.
+    """
+
+    size: int
+    blocks: Dict[int, Block] = dataclasses.field(default_factory=dict)
+    code: Set[int] = dataclasses.field(default_factory=set)
+    invalid: Set[int] = dataclasses.field(default_factory=set)
+    reads: Set[int] = dataclasses.field(default_factory=set)
+    writes: Dict[int, Optional[int]] = dataclasses.field(default_factory=dict)
+    modifies: Set[int] = dataclasses.field(default_factory=set)
+
+    @property
+    def data(self) -> Set[int]:
+        """The addresses in the image which aren't code."""
+        return set(range(self.size)) - self.code
+
+    @property
+    def edges(self) -> List[Tuple[int, int]]:
+        return [(b.start, s) for b in self.blocks.values() for s in b.successors]
+
+    @property
+    def dynamic(self) -> FrozenSet[int]:
+        """The blocks which end in a jump to a target only known at runtime."""
+        return frozenset(b.start for b in self.blocks.values() if b.dynamic)
+
+    @property
+    def relative(self) -> bool:
+        """Whether the program uses the relative base."""
+        return any(
+            s.ins.code == OpCode.ARB or ParamMode.REL in s.ins.modes[: s.ins.size - 1]
+            for b in self.blocks.values()
+            for s in b.steps
+        )
+
+    @property
+    def self_modifying(self) -> bool:
+        return bool(self.modifies)
+
+    @property
+    def complete(self) -> bool:
+        """Whether every instruction the program can execute has been found.
+
+        Only true if no jump is dynamic and no code may be overwritten.
+        """
+        return not (self.dynamic or self.modifies)
+
+    def steps(self) -> Iterable[Step]:
+        for start in sorted(self.blocks):
+            yield from self.blocks[start].steps
+
+    def listing(self) -> str:
+        """A disassembly of the code, one instruction per line, block by block."""
+        lines = []
+        for start in sorted(self.blocks):
+            block = self.blocks[start]
+            succ = ", ".join(map(str, block.successors))
+            dynamic = " (dynamic)" if block.dynamic else ""
+            lines.append(f"block {start} -> [{succ}]{dynamic}")
+            lines.extend(str(s) for s in block.steps)
+            if block.invalid is not None:
+                lines.append(f"{block.invalid:>6}: ???")
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "blocks": {
+                b.start: {
+                    "end": b.end,
+                    "successors": [*b.successors],
+                    "dynamic": b.dynamic,
+                    "halts": b.halts,
+                }
+                for b in sorted(self.blocks.values(), key=lambda b: b.start)
+            },
+            "code": len(self.code),
+            "data": len(self.data),
+            "invalid": sorted(self.invalid),
+            "writes": dict(sorted(self.writes.items())),
+            "modifies": sorted(self.modifies),
+            "relative": self.relative,
+            "complete": self.complete,
+        }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+
+def _block(start: int, memory: Memory) -> Block:
+    """Disassemble the basic block at ``start``, up to and including its exit."""
+    steps: List[Step] = []
+    ip = start
+    while ip < len(memory):
+        try:
+            ins = decode(memory[ip])
+        except ValueError:
+            break
+        step = Step(ip, ins, tuple(memory[ip + i] for i in range(1, ins.size)))
+        steps.append(step)
+        if ins.code == OpCode.STOP:
+            return Block(start, tuple(steps), (), halts=True)
+        if ins.code in JUMP:
+            return _jump(start, steps)
+        ip = step.end
+    # Running off the end of the image (which is zero-filled) or into an invalid
+    # word crashes the program, unless it's patched first.
+    return Block(start, tuple(steps), (), invalid=ip)
+
+
+def _jump(start: int, steps: List[Step]) -> Block:
+    step = steps[-1]
+    (cmode, tmode), (cond, target) = step.ins.modes[:2], step.params
+    taken = bool(cond) if step.ins.code == OpCode.JIT else not cond
+    # A jump on a constant only ever goes one way.
+    fixed = cmode == ParamMode.IMM
+    successors = []
+    if tmode == ParamMode.IMM and (taken or not fixed):
+        successors.append(target)
+    if not (fixed and taken) and step.end not in successors:
+        successors.append(step.end)
+    dynamic = tmode != ParamMode.IMM and (taken or not fixed)
+    return Block(start, tuple(steps), tuple(successors), dynamic)
+
+
+def analyse(memory: Memory, entries: Iterable[int] = (0,)) -> Analysis:
+    """Build the control-flow graph of the program in ``memory`` from ``entries``."""
+    analysis = Analysis(len(memory))
+    work = [*entries]
+    while work:
+        start = work.pop()
+        if start in analysis.blocks or start < 0:
+            continue
+        block = _block(start, memory)
+        analysis.blocks[start] = block
+        work.extend(block.successors)
+    # A jump into the middle of a block splits it.
+    starts = sorted(analysis.blocks)
+    for start in starts:
+        block = analysis.blocks[start]
+        for i, step in enumerate(block.steps[1:], start=1):
+            if step.ip in analysis.blocks:
+                analysis.blocks[start] = Block(start, block.steps[:i], (step.ip,))
+                break
+    analysis.invalid.update(
+        b.invalid for b in analysis.blocks.values() if b.invalid is not None
+    )
+    for step in analysis.steps():
+        analysis.code.update(range(step.ip, step.end))
+        for i, (mode, param) in enumerate(zip(step.ins.modes, step.params), start=1):
+            if mode == ParamMode.POS and i != step.ins.target:
+                analysis.reads.add(param)
+        if step.ins.target:
+            analysis.writes[step.ip] = step.destination
+    for ip, addr in analysis.writes.items():
+        if addr is None or addr in analysis.code or addr in analysis.invalid:
+            analysis.modifies.add(ip)
+    return analysis
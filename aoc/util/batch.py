@@ -0,0 +1,292 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""Lockstep execution of one Intcode program over a batch of memories with NumPy.
+
+Every instance in the batch is a row of a 2-D array of signed 64-bit cells, with its
+own instruction pointer, relative base and input queue. Each step fetches the
+current word of every live instance, groups the instances by opcode and executes
+each group with vectorised gathers and scatters, so the cost of interpretation is
+paid once per step rather than once per instance.
+
+An instance which does anything the batch can't reproduce exactly (overflowing 64
+bits, touching a negative address, writing far beyond the end of its memory,
+running out of input or hitting an invalid instruction) is dropped from the batch
+and re-run from scratch with :py:meth:`~aoc.util.intcode.IntcodeOperator.run`,
+so every result matches the interpreter's.
+
+NumPy is an optional dependency, needed only by this module.
+"""
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+
+from aoc.util.intcode import OpCode, ParamMode
+from aoc.util.pool import BatchResult, Job, _jobs, execute
+
+if TYPE_CHECKING:  # pragma: nocover
+    from aoc.util.intcode import IntcodeOperator
+
+# The widest an instance's memory may grow to, beyond its image, without dropping
+# out of the batch: writes further out than this are left to the interpreter.
+GROWTH = 1 << 12
+
+_INT64 = np.iinfo(np.int64)
+
+
+class _Batch:
+    """The state of every instance in a batch, one row (or entry) per instance."""
+
+    def __init__(self, image: np.ndarray, jobs: Sequence[Job]):
+        n = len(jobs)
+        self.mem = np.tile(image, (n, 1))
+        self.limit = image.size + GROWTH
+        self.ip = np.zeros(n, dtype=np.int64)
+        self.base = np.zeros(n, dtype=np.int64)
+        self.live = np.ones(n, dtype=bool)
+        self.outputs: List[Tuple[np.ndarray, np.ndarray]] = []
+        width = max((len(input) for _, _, input in jobs), default=0)
+        inputs: List[List[int]] = []
+        rows: List[int] = []
+        addrs: List[int] = []
+        values: List[int] = []
+        for row, (_, patch, input) in enumerate(jobs):
+            patch = patch or {}
+            if not (
+                all(map(_fits, input))
+                and all(map(_fits, patch.values()))
+                and all(0 <= addr < self.limit for addr in patch)
+            ):
+                self.live[row] = False
+                inputs.append([0] * width)
+                continue
+            inputs.append([*input, *[0] * (width - len(input))])
+            rows.extend([row] * len(patch))
+            addrs.extend(patch)
+            values.extend(patch.values())
+        self.deferred = ~self.live
+        self.input = np.array(inputs, dtype=np.int64).reshape(n, width)
+        self.lengths = np.array([len(input) for _, _, input in jobs], dtype=np.int64)
+        self.consumed = np.zeros(n, dtype=np.int64)
+        self.store(
+            np.array(rows, dtype=np.intp),
+            np.array(addrs, dtype=np.int64),
+            np.array(values, dtype=np.int64),
+        )
+
+    def defer(self, rows: np.ndarray):
+        self.live[rows] = False
+        self.deferred[rows] = True
+
+    def load(
+        self, rows: np.ndarray, addrs: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Gather the cells at ``addrs``, zero-filled past the end of memory.
+
+        Also returns a mask of the negative addresses, which are invalid.
+        """
+        inside = (addrs >= 0) & (addrs < self.mem.shape[1])
+        values = self.mem[rows, np.where(inside, addrs, 0)]
+        return np.where(inside, values, 0), addrs < 0
+
+    def operand(
+        self, rows: np.ndarray, words: np.ndarray, offset: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Read the operand of each instruction at ``ip + offset`` by its mode."""
+        raw, bad = self.load(rows, self.ip[rows] + offset)
+        mode = words // 10 ** (offset + 1) % 10
+        addrs, over = _add(self.base[rows], raw)
+        addrs = np.where(mode == ParamMode.REL, addrs, raw)
+        values, invalid = self.load(rows, addrs)
+        bad |= (mode != ParamMode.IMM) & (invalid | (over & (mode == ParamMode.REL)))
+        return np.where(mode == ParamMode.IMM, raw, values), bad
+
+    def address(
+        self, rows: np.ndarray, words: np.ndarray, offset: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Read the address written to by each instruction via ``ip + offset``."""
+        raw, bad = self.load(rows, self.ip[rows] + offset)
+        mode = words // 10 ** (offset + 1) % 10
+        addrs, over = _add(self.base[rows], raw)
+        rel = mode == ParamMode.REL
+        addrs = np.where(rel, addrs, raw)
+        return addrs, bad | (rel & over) | (addrs < 0) | (addrs >= self.limit)
+
+    def store(self, rows: np.ndarray, addrs: np.ndarray, values: np.ndarray):
+        width = self.mem.shape[1]
+        if addrs.size and addrs.max() >= width:
+            # Grow geometrically, as Memory.reserve does.
+            size = max(int(addrs.max()) + 1, width + width // 2)
+            grown = np.zeros((self.mem.shape[0], size), dtype=np.int64)
+            grown[:, :width] = self.mem
+            self.mem = grown
+        self.mem[rows, addrs] = values
+
+
+def _fits(value: int) -> bool:
+    return -(1 << 63) <= value < 1 << 63
+
+
+def _add(a: np.ndarray, b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Add with wraparound, along with a mask of the sums which overflowed."""
+    with np.errstate(over="ignore"):
+        result = a + b
+    return result, ((a ^ result) & (b ^ result)) < 0
+
+
+def _mul(a: np.ndarray, b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Multiply with wraparound, along with a mask of the products which overflowed."""
+    with np.errstate(over="ignore"):
+        result = a * b
+    nonzero = a != 0
+    check = np.where(nonzero, a, 1)
+    with np.errstate(over="ignore"):
+        over = nonzero & ((result // check != b) | ((a == -1) & (b == _INT64.min)))
+    return result, over
+
+
+def _compute(batch: _Batch, code: OpCode, rows: np.ndarray, words: np.ndarray):
+    a, bad = batch.operand(rows, words, 1)
+    b, bad_b = batch.operand(rows, words, 2)
+    c, bad_c = batch.address(rows, words, 3)
+    if code == OpCode.ADD:
+        result, over = _add(a, b)
+    elif code == OpCode.MUL:
+        result, over = _mul(a, b)
+    elif code == OpCode.FLT:
+        result, over = (a < b).astype(np.int64), False
+    else:
+        result, over = (a == b).astype(np.int64), False
+    bad |= bad_b | bad_c | over
+    ok = ~bad
+    batch.defer(rows[bad])
+    batch.store(rows[ok], c[ok], result[ok])
+    batch.ip[rows[ok]] += 4
+
+
+def _jump(batch: _Batch, code: OpCode, rows: np.ndarray, words: np.ndarray):
+    a, bad = batch.operand(rows, words, 1)
+    b, bad_b = batch.operand(rows, words, 2)
+    bad |= bad_b
+    taken = (a != 0) if code == OpCode.JIT else (a == 0)
+    ok = ~bad
+    batch.defer(rows[bad])
+    batch.ip[rows[ok]] = np.where(taken, b, batch.ip[rows] + 3)[ok]
+
+
+def _input(batch: _Batch, code: OpCode, rows: np.ndarray, words: np.ndarray):
+    c, bad = batch.address(rows, words, 1)
+    consumed = batch.consumed[rows]
+    # Running dry raises InputRequired, which the interpreter reproduces.
+    bad |= consumed == batch.lengths[rows]
+    ok = ~bad
+    batch.defer(rows[bad])
+    rows, c, consumed = rows[ok], c[ok], consumed[ok]
+    batch.store(rows, c, batch.input[rows, consumed])
+    batch.consumed[rows] += 1
+    batch.ip[rows] += 2
+
+
+def _output(batch: _Batch, code: OpCode, rows: np.ndarray, words: np.ndarray):
+    a, bad = batch.operand(rows, words, 1)
+    ok = ~bad
+    batch.defer(rows[bad])
+    batch.outputs.append((rows[ok], a[ok]))
+    batch.ip[rows[ok]] += 2
+
+
+def _relative(batch: _Batch, code: OpCode, rows: np.ndarray, words: np.ndarray):
+    a, bad = batch.operand(rows, words, 1)
+    base, over = _add(batch.base[rows], a)
+    bad |= over
+    ok = ~bad
+    batch.defer(rows[bad])
+    batch.base[rows[ok]] = base[ok]
+    batch.ip[rows[ok]] += 2
+
+
+HANDLERS = {
+    OpCode.ADD: _compute,
+    OpCode.MUL: _compute,
+    OpCode.FLT: _compute,
+    OpCode.FEQ: _compute,
+    OpCode.JIT: _jump,
+    OpCode.JIF: _jump,
+    OpCode.IN: _input,
+    OpCode.OUT: _output,
+    OpCode.ARB: _relative,
+}
+
+
+def _step(batch: _Batch):
+    rows = np.flatnonzero(batch.live)
+    words, bad = batch.load(rows, batch.ip[rows])
+    codes = words % 100
+    modes = words // 100
+    # Only the three mode digits which decode() checks need to be valid.
+    bad |= (
+        (words < 0)
+        | (modes % 10 > ParamMode.REL)
+        | (modes // 10 % 10 > ParamMode.REL)
+        | (modes // 100 % 10 > ParamMode.REL)
+    )
+    known = codes == OpCode.STOP
+    batch.live[rows[known & ~bad]] = False
+    for code, handler in HANDLERS.items():
+        group = codes == code
+        known |= group
+        group &= ~bad
+        if group.any():
+            handler(batch, code, rows[group], words[group])
+    batch.defer(rows[bad | ~known])
+
+
+def run_batch(
+    program: "IntcodeOperator",
+    patches: Optional[Iterable[Optional[Mapping[int, int]]]] = None,
+    inputs: Optional[Iterable[Sequence[int]]] = None,
+    *,
+    read: Sequence[int] = (),
+) -> List[BatchResult]:
+    """Run ``program`` once per patch and/or input vector, in lockstep, on one core.
+
+    ``patches`` and ``inputs`` are zipped together as for
+    :py:func:`aoc.util.pool.run_many`, and a result is returned for each run in
+    submission order, with ``cells`` holding the final values at ``read``.
+    """
+    jobs = [*_jobs(patches, inputs)]
+    read = tuple(read)
+    if any(a < 0 for a in read):
+        raise IndexError(f"{min(read)!r} is not a valid address.")
+    try:
+        image = np.array([*program.array.cells], dtype=np.int64)
+    except OverflowError:
+        return [execute(program, job, read) for job in jobs]
+    batch = _Batch(image, jobs)
+    while batch.live.any():
+        _step(batch)
+
+    outputs: Dict[int, List[int]] = {index: [] for index, _, _ in jobs}
+    for rows, values in batch.outputs:
+        for row, value in zip(rows.tolist(), values.tolist()):
+            outputs[row].append(value)
+    width = batch.mem.shape[1]
+    cells = np.zeros((len(jobs), len(read)), dtype=np.int64)
+    for i, addr in enumerate(read):
+        if addr < width:
+            cells[:, i] = batch.mem[:, addr]
+    results = []
+    for row, (job, values) in enumerate(zip(jobs, map(tuple, cells.tolist()))):
+        if batch.deferred[row]:
+            results.append(execute(program, job, read))
+        else:
+            results.append(BatchResult(job[0], outputs[row], values))
+    return results
@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""Memoisation of complete Intcode runs.
+
+A run is a pure function of the program image, the patch applied to it and its
+input, so its outputs can be cached under a hash of all three. A
+:py:class:`ResultCache` keeps a bounded, in-process LRU in front of an optional
+SQLite store on disk, which is shared safely between processes (e.g., the workers
+of :py:meth:`~aoc.util.intcode.IntcodeOperator.run_many`) and survives between
+invocations.
+"""
+import collections
+import hashlib
+import os
+import pathlib
+import pickle
+import sqlite3
+import time
+from array import array
+from typing import (
+    Any,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    OrderedDict,
+    Sequence,
+    Union,
+)
+
+from aoc.util.memory import Memory
+
+ENV = "AOC_INTCODE_CACHE"
+# Bumped whenever the meaning of a run's arguments changes, e.g. the order in which
+# input is consumed, so that stale entries on disk are never hit.
+VERSION = 2
+# The number of writes to the on-disk store between evictions.
+EVICT_EVERY = 256
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    used REAL NOT NULL
+)
+"""
+
+
+def digest(image: Memory) -> str:
+    """A content hash of a program image."""
+    h = hashlib.blake2b(digest_size=20)
+    try:
+        h.update(array("q", image.cells).tobytes())
+    except OverflowError:
+        h.update(repr([*image.cells]).encode())
+    return h.hexdigest()
+
+
+def key(
+    image: str,
+    input: Sequence[int],
+    patch: Optional[Mapping[int, int]] = None,
+    debug: bool = False,
+) -> str:
+    """The cache key for a single run of the image with the digest ``image``."""
+    args = (tuple(input), sorted((patch or {}).items()), debug)
+    data = f"{VERSION}:{image}:{args!r}".encode()
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+class ResultCache:
+    """An LRU of run results of at most ``maxsize`` entries, backed by an optional
+    on-disk store at ``path`` of around ``disk_maxsize`` entries.
+
+    The least recently used entries are evicted from each once they're full; the
+    on-disk store is trimmed every :py:data:`EVICT_EVERY` writes and on
+    :py:meth:`close`.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        *,
+        path: Union[str, os.PathLike] = None,
+        disk_maxsize: int = 1 << 16,
+    ):
+        self.maxsize = maxsize
+        self.path = pathlib.Path(path) if path else None
+        self.disk_maxsize = disk_maxsize
+        self.hits = self.misses = 0
+        self._puts = 0
+        self._lru: OrderedDict[str, List[Any]] = collections.OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    @classmethod
+    def from_env(cls, maxsize: int = 1024) -> "ResultCache":
+        """Create a cache which persists to the file named by ``$AOC_INTCODE_CACHE``.
+
+        The cache is in-process only if the variable isn't set.
+        """
+        return cls(maxsize, path=os.environ.get(ENV) or None)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Connections can't cross processes, and each process keeps its own LRU.
+        state = self.__dict__.copy()
+        state.update(_lru=collections.OrderedDict(), _db=None, _pid=None)
+        return state
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self.path is None:
+            return None
+        if self._db is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), timeout=30)
+            # WAL lets readers in other processes carry on while one of them writes,
+            # and without a sync on every commit.
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(_SCHEMA)
+            self._pid = os.getpid()
+        return self._db
+
+    def get(self, key: str) -> Optional[List[Any]]:
+        if key in self._lru:
+            self._lru.move_to_end(key)
+            self.hits += 1
+            return self._lru[key]
+        db = self._connect()
+        if db is not None:
+            with db:
+                row = db.execute(
+                    "SELECT value FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    db.execute(
+                        "UPDATE results SET used = ? WHERE key = ?",
+                        (time.time(), key),
+                    )
+            if row is not None:
+                value = pickle.loads(row[0])
+                self._remember(key, value)
+                self.hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: List[Any]):
+        self._remember(key, value)
+        db = self._connect()
+        if db is not None:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                    (key, data, time.time()),
+                )
+            self._puts += 1
+            if self._puts % EVICT_EVERY == 0:
+                self.evict()
+
+    def evict(self):
+        """Drop the least recently used entries beyond the on-disk size bound."""
+        db = self._connect()
+        if db is not None:
+            with db:
+                db.execute(
+                    "DELETE FROM results WHERE key NOT IN "
+                    "(SELECT key FROM results ORDER BY used DESC LIMIT ?)",
+                    (self.disk_maxsize,),
+                )
+
+    def _remember(self, key: str, value: List[Any]):
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+
+    def clear(self):
+        """Empty the cache, including the on-disk store."""
+        self._lru.clear()
+        self.hits = self.misses = 0
+        db = self._connect()
+        if db is not None:
+            with db:
+                db.execute("DELETE FROM results")
+
+    def close(self):
+        if self._db is not None:
+            self.evict()
+            self._db.close()
+            self._db = None
+
+    def __len__(self) -> int:
+        return len(self._lru)
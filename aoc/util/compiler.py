@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""Compilation of Intcode programs into Python functions.
+
+Starting from an entry address, every basic block which is statically reachable
+(through fall-through and immediate jump targets) is emitted as straight-line Python
+source, with its parameter modes and addresses resolved statically. The blocks are
+joined into a single function per entry point, a "region", which dispatches between
+them with a decision tree over the instruction pointer. The region at address 0 is
+compiled ahead of time from the program image; regions for code which only appears
+at runtime (e.g., an opcode the program patches before executing it, or the target of
+a computed jump) are compiled the first time they're entered.
+
+A region is only valid while the code it was built from is unchanged, so its code
+words are checked against memory each time it's entered, and any write into its own
+code exits the region. Anything which can't be compiled (halting, waiting on input,
+invalid instructions, relative addressing) falls back to the interpreter.
+
+Compilation pays off for programs which spend their time in loops; very short runs,
+such as the Day 7 amplifiers, are dominated by region validation and are better off
+interpreted.
+"""
+import dataclasses
+import itertools
+import sys
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    MutableSequence,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from aoc.util.intcode import JUMP, Decoded, OpCode, ParamMode, VMState, decode
+from aoc.util.memory import Memory
+
+if TYPE_CHECKING:  # pragma: nocover
+    from aoc.util.intcode import IntcodeOperator
+
+RegionT = Callable[
+    [MutableSequence[int], List[int], Callable[[int], None], int], Tuple[int, int]
+]
+
+# The number of differently-patched versions of a region kept for one address.
+VARIANTS = 8
+
+
+@dataclasses.dataclass(frozen=True)
+class Region:
+    """A compiled function covering all the code statically reachable from ``entry``.
+
+    The function takes the memory buffer, the pending input, an output callback and
+    a budget of instructions, and returns the next address and the remaining budget.
+    """
+
+    entry: int
+    ranges: List[Tuple[int, int, List[int]]]
+    top: int
+    fn: RegionT
+    source: str
+
+    def valid(self, cells: MutableSequence[int]) -> bool:
+        """Whether the code this region was compiled from is unchanged in ``cells``."""
+        for lo, hi, words in self.ranges:
+            if cells[lo:hi] != words:
+                return False
+        return True
+
+
+_BINARY = {
+    OpCode.ADD: "{a} + {b}",
+    OpCode.MUL: "{a} * {b}",
+    OpCode.FLT: "1 if {a} < {b} else 0",
+    OpCode.FEQ: "1 if {a} == {b} else 0",
+}
+
+
+def _operand(mode: ParamMode, param: int) -> str:
+    return f"mem[{param}]" if mode == ParamMode.POS else repr(param)
+
+
+def _walk(start: int, memory: Memory) -> List[Tuple[int, Decoded, List[int]]]:
+    """Collect the straight-line instructions which make up the block at ``start``."""
+    found = []
+    ip = start
+    while True:
+        try:
+            ins = decode(memory[ip])
+        except ValueError:
+            break
+        # Halting and waiting on input are left to the interpreter, so a block
+        # may only read input with its first instruction.
+        if ins.code == OpCode.STOP or (ins.code == OpCode.IN and ip != start):
+            break
+        # As is anything which depends on the relative base.
+        if ins.code == OpCode.ARB or ParamMode.REL in ins.modes[: ins.size - 1]:
+            break
+        params = [memory[ip + i] for i in range(1, ins.size)]
+        if any(p < 0 for p, m in zip(params, ins.modes) if m == ParamMode.POS):
+            break
+        # Compiled code indexes the buffer directly, so it must cover every address.
+        extent = ins.extent(ip, memory)
+        memory.reserve(extent)
+        if len(memory) < extent:
+            break
+        found.append((ip, ins, params))
+        if ins.code in JUMP:
+            break
+        ip += ins.size
+    return found
+
+
+def _dispatch(starts: List[int], bodies: Dict[int, List[str]], indent: int) -> List[str]:
+    """Emit a balanced decision tree over the block addresses in ``starts``."""
+    pad = " " * indent
+    if len(starts) == 1:
+        start = starts[0]
+        body = [f"{pad}    {line}" for line in bodies[start]]
+        return [f"{pad}if ip == {start}:", *body, f"{pad}else:", f"{pad}    return ip, budget"]
+    mid = len(starts) // 2
+    return [
+        f"{pad}if ip < {starts[mid]}:",
+        *_dispatch(starts[:mid], bodies, indent + 4),
+        f"{pad}else:",
+        *_dispatch(starts[mid:], bodies, indent + 4),
+    ]
+
+
+def _block(
+    found: List[Tuple[int, Decoded, List[int]]], code: Set[int]
+) -> Tuple[List[str], int]:
+    """Emit the body of a single basic block within a region."""
+    lines = []
+    if found[0][1].code == OpCode.IN:
+        lines.append("if not inp: return ip, budget")
+    lines.append(f"budget -= {len(found)}")
+    top = 0
+    for ip, ins, params in found:
+        nxt = ip + ins.size
+        ops = [_operand(m, p) for m, p in zip(ins.modes, params)]
+        top = max((top, nxt, *(p + 1 for m, p in zip(ins.modes, params) if not m)))
+        writes = params[ins.target - 1] if ins.target else None
+        if ins.code in _BINARY:
+            expr = _BINARY[ins.code].format(a=ops[0], b=ops[1])
+            lines.append(f"mem[{writes}] = {expr}")
+        elif ins.code == OpCode.IN:
+            lines.append(f"mem[{writes}] = inp.popleft()")
+        elif ins.code == OpCode.OUT:
+            lines.append(f"out({ops[0]})")
+        else:
+            test = ops[0] if ins.code == OpCode.JIT else f"not {ops[0]}"
+            lines.append(f"ip = {ops[1]} if {test} else {nxt}")
+            return lines, top
+        # The rest of this region may be stale once it writes into its own code.
+        if writes in code:
+            lines.append(f"return {nxt}, budget")
+            return lines, top
+    lines.append(f"ip = {nxt}")
+    return lines, top
+
+
+def build(entry: int, memory: Memory) -> Optional[Region]:
+    """Compile the region of code reachable from ``entry`` in its current state."""
+    blocks: Dict[int, List[Tuple[int, Decoded, List[int]]]] = {}
+    work = [entry]
+    while work:
+        start = work.pop()
+        if start in blocks or start < 0:
+            continue
+        found = _walk(start, memory)
+        if not found:
+            continue
+        blocks[start] = found
+        ip, ins, params = found[-1]
+        nxt = ip + ins.size
+        if ins.code in JUMP:
+            cmode, tmode = ins.modes[:2]
+            if tmode == ParamMode.IMM:
+                work.append(params[1])
+            taken = bool(params[0]) if ins.code == OpCode.JIT else not params[0]
+            if cmode == ParamMode.IMM and taken:
+                continue
+        work.append(nxt)
+    if entry not in blocks:
+        return None
+    code = {
+        a
+        for found in blocks.values()
+        for ip, ins, _ in found
+        for a in range(ip, ip + ins.size)
+    }
+    bodies: Dict[int, List[str]] = {}
+    top = 0
+    for start, found in blocks.items():
+        bodies[start], high = _block(found, code)
+        top = max(top, high)
+    lines = [
+        f"def _region_{entry}(mem, inp, out, budget):",
+        f"    ip = {entry}",
+        "    while budget > 0:",
+        *_dispatch(sorted(bodies), bodies, 8),
+        "    return ip, budget",
+    ]
+    source = "\n".join(lines)
+    namespace: Dict[str, RegionT] = {}
+    exec(compile(source, f"<intcode:{entry}>", "exec"), namespace)
+    ranges = []
+    addrs = sorted(code)
+    for _, group in itertools.groupby(enumerate(addrs), lambda x: x[1] - x[0]):
+        span = [a for _, a in group]
+        lo, hi = span[0], span[-1] + 1
+        ranges.append((lo, hi, [memory[a] for a in range(lo, hi)]))
+    return Region(entry, ranges, top, namespace[f"_region_{entry}"], source)
+
+
+@dataclasses.dataclass
+class CompiledProgram:
+    regions: Dict[int, List[Region]] = dataclasses.field(default_factory=dict)
+    extent: int = 0
+
+    @property
+    def source(self) -> str:
+        return "\n\n".join(r.source for v in self.regions.values() for r in v)
+
+    def find(self, memory: Memory, ip: int) -> Optional[Region]:
+        """Find a region at ``ip`` which is valid for ``memory``, compiling one if needed."""
+        variants = self.regions.setdefault(ip, [])
+        for region in variants:
+            if region.valid(memory.cells):
+                return region
+        if len(variants) >= VARIANTS:
+            return None
+        region = build(ip, memory)
+        if region is not None:
+            variants.insert(0, region)
+            self.extent = max(self.extent, region.top)
+            memory.reserve(region.top)
+        return region
+
+
+def compile_program(image: Memory) -> CompiledProgram:
+    """Compile the statically reachable code in ``image`` ahead of time."""
+    compiled = CompiledProgram()
+    image = image.copy()
+    image.promote()
+    compiled.find(image, 0)
+    return compiled
+
+
+def execute(
+    program: "IntcodeOperator",
+    compiled: CompiledProgram,
+    state: VMState,
+    *,
+    steps: int = None,
+    pause: bool = True,
+) -> Iterator[int]:
+    """Execute ``state`` using compiled regions where possible.
+
+    ``steps`` is counted per basic block, so it may be overshot by up to one block.
+    """
+    memory = state.memory
+    memory.promote()
+    memory.reserve(compiled.extent)
+    budget = sys.maxsize if steps is None else steps
+    outputs: List[int] = []
+    out = outputs.append
+    ip = state.ip
+    regions = compiled.regions
+    while budget > 0:
+        variants = regions.get(ip)
+        region = variants[0] if variants else None
+        if region is None or not region.valid(memory.cells):
+            region = compiled.find(memory, ip)
+        left = budget
+        if region is not None:
+            ip, left = region.fn(memory.cells, state.input, out, budget)
+            if outputs:
+                state.outputs += len(outputs)
+                yield from outputs
+                outputs.clear()
+        # Nothing compiled could make progress, e.g. when halting or waiting on input.
+        if left == budget:
+            state.ip = ip
+            yield from program.interpret(state, steps=1, pause=pause)
+            if state.ip == ip:
+                break
+            ip = state.ip
+            left -= 1
+        budget = left
+    state.ip = ip
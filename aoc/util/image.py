@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""A compact binary format for Intcode program images.
+
+A file is laid out as::
+
+    header    magic, version, number of cells, number of overflow entries
+    cells     one little-endian int64 per cell
+    overflow  (address, length, signed little-endian bytes) per cell which doesn't
+              fit in 64 bits; its slot in ``cells`` holds 0
+
+Loading maps the file and copies the packed cells straight into the memory backend,
+so start-up doesn't involve parsing text. Convert an existing puzzle input with::
+
+    python -m aoc.util.image aoc/day5/input1.txt [aoc/day5/input1.icb]
+"""
+import mmap
+import pathlib
+import struct
+import sys
+from array import array
+from typing import List, Tuple, Type, Union
+
+from aoc.util.memory import Memory
+from aoc.util.parser import parse
+
+MAGIC = b"ICIM"
+VERSION = 1
+SUFFIX = ".icb"
+HEADER = struct.Struct("<4sIqq")
+CELL = struct.Struct("<q")
+OVERFLOW = struct.Struct("<qI")
+
+PathT = Union[str, pathlib.Path]
+
+
+def is_image(path: PathT) -> bool:
+    """Whether the file at ``path`` is a binary program image."""
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def dumps(cells: Memory) -> bytes:
+    packed = array("q")
+    overflow: List[Tuple[int, int]] = []
+    for addr, value in enumerate(cells):
+        try:
+            packed.append(value)
+        except OverflowError:
+            packed.append(0)
+            overflow.append((addr, value))
+    if sys.byteorder != "little":  # pragma: nocover
+        packed.byteswap()
+    parts = [HEADER.pack(MAGIC, VERSION, len(packed), len(overflow)), packed.tobytes()]
+    for addr, value in overflow:
+        data = value.to_bytes((value.bit_length() + 8) // 8, "little", signed=True)
+        parts += [OVERFLOW.pack(addr, len(data)), data]
+    return b"".join(parts)
+
+
+def dump(cells: Memory, path: PathT):
+    pathlib.Path(path).write_bytes(dumps(cells))
+
+
+def loads(
+    data: Union[bytes, mmap.mmap], *, memory: Type[Memory] = Memory
+) -> Memory:
+    magic, version, count, overflows = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Not a version {VERSION} Intcode program image.")
+    start = HEADER.size
+    stop = start + count * CELL.size
+    with memoryview(data) as view:
+        loaded = memory.from_buffer(view[start:stop])
+    offset = stop
+    for _ in range(overflows):
+        addr, length = OVERFLOW.unpack_from(data, offset)
+        offset += OVERFLOW.size
+        value = data[offset : offset + length]
+        loaded[addr] = int.from_bytes(value, "little", signed=True)
+        offset += length
+    return loaded
+
+
+def load(path: PathT, *, memory: Type[Memory] = Memory) -> Memory:
+    """Load the program image at ``path`` into a new ``memory``."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        return loads(m, memory=memory)
+
+
+def convert(source: PathT, target: PathT = None) -> pathlib.Path:
+    """Convert a comma-separated program into a binary image next to it."""
+    source = pathlib.Path(source)
+    target = pathlib.Path(target) if target else source.with_suffix(SUFFIX)
+    dump(Memory(parse(source)), target)
+    return target
+
+
+if __name__ == "__main__":
+    print(convert(*sys.argv[1:3]))
@@ -1,10 +1,16 @@
 #!/usr/bin/env python
 # -*- coding: UTF-8 -*-
+import collections
 import dataclasses
 import enum
+import functools
+import itertools
 import operator
-from collections import defaultdict
+import os
+import pickle
 from typing import (
+    TYPE_CHECKING,
+    Deque,
     List,
     Callable,
     Mapping,
@@ -12,13 +18,27 @@ from typing import (
     Iterator,
     Union,
     Optional,
-    DefaultDict,
+    Dict,
     Iterable,
+    MutableSequence,
+    Sequence,
     TypeVar,
     Type,
 )
 from typing_extensions import TypedDict
 
+from aoc.util import ports
+from aoc.util.memory import Memory
+
+if TYPE_CHECKING:  # pragma: nocover
+    from aoc.util.analysis import Analysis
+    from aoc.util.cache import ResultCache
+    from aoc.util.compiler import CompiledProgram
+    from aoc.util.pool import BatchResult
+    from aoc.util.profiler import Profile
+    from aoc.util.symbolic import SymbolicResult
+    from aoc.util.trace import Trace
+
 
 class OpCode(enum.IntEnum):
     ADD = 1
@@ -29,42 +49,49 @@ class OpCode(enum.IntEnum):
     JIF = 6
     FLT = 7
     FEQ = 8
+    ARB = 9
     STOP = 99
 
 
 class ParamMode(enum.IntEnum):
     POS = 0
     IMM = 1
+    REL = 2
 
 
 class OpConfig(TypedDict, total=False):
     op: Callable[..., int]
     adix: int
+    params: int
 
 
 COMPUTE: Mapping[OpCode, OpConfig] = {
-    OpCode.ADD: {"op": operator.add, "adix": 3},
-    OpCode.MUL: {"op": operator.mul, "adix": 3},
+    OpCode.ADD: {"op": operator.add, "adix": 3, "params": 3},
+    OpCode.MUL: {"op": operator.mul, "adix": 3, "params": 3},
 }
 
 IO: Mapping[OpCode, OpConfig] = {
-    OpCode.IN: {"adix": 1},
-    OpCode.OUT: {"adix": 1},
+    OpCode.IN: {"adix": 1, "params": 1},
+    OpCode.OUT: {"adix": 1, "params": 1},
 }
 
 FLIP: Mapping[OpCode, OpConfig] = {
-    OpCode.FLT: {"op": operator.lt, "adix": 3},
-    OpCode.FEQ: {"op": operator.eq, "adix": 3},
+    OpCode.FLT: {"op": operator.lt, "adix": 3, "params": 3},
+    OpCode.FEQ: {"op": operator.eq, "adix": 3, "params": 3},
 }
 
 JUMP: Mapping[OpCode, OpConfig] = {
-    OpCode.JIT: {"op": bool, "adix": 3},
-    OpCode.JIF: {"op": lambda x: not x, "adix": 3},
+    OpCode.JIT: {"op": bool, "adix": 3, "params": 2},
+    OpCode.JIF: {"op": lambda x: not x, "adix": 3, "params": 2},
+}
+
+RELATIVE: Mapping[OpCode, OpConfig] = {
+    OpCode.ARB: {"op": operator.add, "adix": 1, "params": 1},
 }
 
-OPERATIONS = {**COMPUTE, **IO, **FLIP, **JUMP}
+OPERATIONS = {**COMPUTE, **IO, **FLIP, **JUMP, **RELATIVE}
 
-HandlerT = Callable[[int, DefaultDict[int, int], int], Tuple[int, int]]
+HandlerT = Callable[[int, MutableSequence[int], "VMState"], Tuple[Optional[int], int]]
 
 
 @dataclasses.dataclass
@@ -104,7 +131,7 @@ class Instruction:
         return self.index[item]
 
     def get_args(
-        self, pos: int, array: DefaultDict[int, int]
+        self, pos: int, array: Memory
     ) -> Tuple[int, int, Iterator[int]]:
         """Get the args for an instruction."""
         start, stop = pos + 1, pos + self.adix
@@ -113,7 +140,7 @@ class Instruction:
         return start, stop, args
 
     def compute(
-        self, pos: int, array: DefaultDict[int, int], *, input: List[int] = None
+        self, pos: int, array: Memory, *, input: List[int] = None
     ) -> Tuple[Optional[int], int]:
         """'compute' a new value from the parameters and store it."""
         start, stop, (a, b) = self.get_args(pos, array)
@@ -123,7 +150,7 @@ class Instruction:
         return None, stop + 1
 
     def io(
-        self, pos: int, array: DefaultDict[int, int], *, input: List[int] = None
+        self, pos: int, array: Memory, *, input: List[int] = None
     ) -> Tuple[Optional[int], int]:
         """Store an input or send a value."""
         stop = pos + self.adix
@@ -139,7 +166,7 @@ class Instruction:
         return res, stop + 1
 
     def jump(
-        self, pos: int, array: DefaultDict[int, int], *, input: List[int] = None
+        self, pos: int, array: Memory, *, input: List[int] = None
     ) -> Tuple[Optional[int], int]:
         """Move the pointer to a new position if a condition is met."""
         start, stop, (a, b) = self.get_args(pos, array)
@@ -147,54 +174,565 @@ class Instruction:
         return None, pos
 
     def flip(
-        self, pos: int, array: DefaultDict[int, int], *, input: List[int] = None
-    ) -> Tuple[int, int]:
+        self, pos: int, array: Memory, *, input: List[int] = None
+    ) -> Tuple[Optional[int], int]:
         """Store a tiny-int of the result of a logical operation."""
         start, stop, (a, b) = self.get_args(pos, array)
         target = array[stop]
         array[target] = int(self.operate(a, b))
-        return 0, stop + 1
+        return None, stop + 1
 
     def execute(
-        self, pos: int, array: DefaultDict[int, int], *, input: List[int] = None
+        self, pos: int, array: Memory, *, input: List[int] = None
     ):
         return self.handlers[self.code](pos, array, input=input)
 
 
+class InputRequired(RuntimeError):
+    """Raised when an IN instruction is reached with no pending input."""
+
+
+ReaderT = Callable[[int, MutableSequence[int], "VMState"], int]
+
+
+def _reader(mode: ParamMode, offset: int) -> ReaderT:
+    """Build an operand reader for the parameter found at ``pos + offset``."""
+    if mode == ParamMode.IMM:
+        return lambda pos, mem, state: mem[pos + offset]
+    if mode == ParamMode.REL:
+        return lambda pos, mem, state: mem[state.base + mem[pos + offset]]
+    return lambda pos, mem, state: mem[mem[pos + offset]]
+
+
+def _address(mode: ParamMode, offset: int) -> ReaderT:
+    """Build a reader for the address given by the parameter at ``pos + offset``."""
+    if mode == ParamMode.REL:
+        return lambda pos, mem, state: state.base + mem[pos + offset]
+    return lambda pos, mem, state: mem[pos + offset]
+
+
+def _compute_handler(code: OpCode, modes: Tuple[ParamMode, ...]) -> HandlerT:
+    op = OPERATIONS[code]["op"]
+    a, b = _reader(modes[0], 1), _reader(modes[1], 2)
+    c = _address(modes[2], 3)
+
+    def compute(pos, mem, state):
+        mem[c(pos, mem, state)] = op(a(pos, mem, state), b(pos, mem, state))
+        return None, pos + 4
+
+    return compute
+
+
+def _flip_handler(code: OpCode, modes: Tuple[ParamMode, ...]) -> HandlerT:
+    op = OPERATIONS[code]["op"]
+    a, b = _reader(modes[0], 1), _reader(modes[1], 2)
+    c = _address(modes[2], 3)
+
+    def flip(pos, mem, state):
+        mem[c(pos, mem, state)] = 1 if op(a(pos, mem, state), b(pos, mem, state)) else 0
+        return None, pos + 4
+
+    return flip
+
+
+def _jump_handler(code: OpCode, modes: Tuple[ParamMode, ...]) -> HandlerT:
+    op = OPERATIONS[code]["op"]
+    a, b = _reader(modes[0], 1), _reader(modes[1], 2)
+
+    def jump(pos, mem, state):
+        return None, b(pos, mem, state) if op(a(pos, mem, state)) else pos + 3
+
+    return jump
+
+
+def _io_handler(code: OpCode, modes: Tuple[ParamMode, ...]) -> HandlerT:
+    if code == OpCode.IN:
+        c = _address(modes[0], 1)
+
+        def read(pos, mem, state):
+            input = state.input
+            if not input and not state.fill():
+                raise InputRequired(f"{code}: can't proceed without input.")
+            # Only consume the input once the store has succeeded.
+            mem[c(pos, mem, state)] = input[0]
+            input.popleft()
+            return None, pos + 2
+
+        return read
+
+    a = _reader(modes[0], 1)
+
+    def write(pos, mem, state):
+        return a(pos, mem, state), pos + 2
+
+    return write
+
+
+def _relative_handler(code: OpCode, modes: Tuple[ParamMode, ...]) -> HandlerT:
+    a = _reader(modes[0], 1)
+
+    def adjust(pos, mem, state):
+        state.base += a(pos, mem, state)
+        return None, pos + 2
+
+    return adjust
+
+
+HANDLERS: Mapping[OpCode, Callable[[OpCode, Tuple[ParamMode, ...]], HandlerT]] = {
+    **{code: _compute_handler for code in COMPUTE},
+    **{code: _io_handler for code in IO},
+    **{code: _flip_handler for code in FLIP},
+    **{code: _jump_handler for code in JUMP},
+    **{code: _relative_handler for code in RELATIVE},
+}
+
+WRITES: Mapping[OpCode, int] = {
+    OpCode.ADD: 3,
+    OpCode.MUL: 3,
+    OpCode.IN: 1,
+    OpCode.FLT: 3,
+    OpCode.FEQ: 3,
+}
+
+
+@dataclasses.dataclass(frozen=True)
+class Decoded:
+    """A raw opcode word, decoded once and shared by every address which holds it.
+
+    ``handler`` is specialised for this exact combination of parameter modes and is
+    ``None`` for :py:attr:`OpCode.STOP`. ``target`` is the offset of the parameter
+    which holds the address this instruction writes to, or 0 if it doesn't write.
+    """
+
+    __slots__ = ("word", "code", "modes", "size", "target", "handler")
+    word: int
+    code: OpCode
+    modes: Tuple[ParamMode, ...]
+    size: int
+    target: int
+    handler: Optional[HandlerT]
+
+    def extent(self, pos: int, memory: Memory, base: int = 0) -> int:
+        """The size of memory needed for this instruction to execute at ``pos``."""
+        stop = pos + self.size
+        addrs = (
+            memory[pos + i] + (base if mode == ParamMode.REL else 0)
+            for i, mode in enumerate(self.modes[: self.size - 1], start=1)
+            if mode != ParamMode.IMM
+        )
+        return max((stop, *(a + 1 for a in addrs)))
+
+    def destination(self, pos: int, memory: Memory, base: int = 0) -> Optional[int]:
+        """The address this instruction writes to when executed at ``pos``, if any."""
+        if not self.target:
+            return None
+        addr = memory[pos + self.target]
+        return base + addr if self.modes[self.target - 1] == ParamMode.REL else addr
+
+
+@functools.lru_cache(maxsize=None)
+def decode(word: int) -> Decoded:
+    """Decode a raw opcode word (e.g., ``1002``) into a shared instruction."""
+    if word < 0:
+        raise ValueError(f"{word!r} is not a valid instruction.")
+    code = OpCode(word % 100)
+    modes = tuple(ParamMode(word // 10 ** i % 10) for i in (2, 3, 4))
+    if code == OpCode.STOP:
+        return Decoded(word, code, modes, 1, 0, None)
+    size = OPERATIONS[code]["params"] + 1
+    handler = HANDLERS[code](code, modes)
+    return Decoded(word, code, modes, size, WRITES.get(code, 0), handler)
+
+
+class DecodeCache(Dict[int, Decoded]):
+    """A per-run mapping of address -> decoded instruction.
+
+    Addresses are decoded lazily from the backing memory on first execution. Any
+    write to a decoded address must be followed by :py:meth:`invalidate`.
+    """
+
+    __slots__ = ("memory",)
+
+    def __init__(self, memory: Memory):
+        super().__init__()
+        self.memory = memory
+
+    def __missing__(self, pos: int) -> Decoded:
+        ins = self[pos] = decode(self.memory[pos])
+        return ins
+
+    def invalidate(self, pos: int):
+        self.pop(pos, None)
+
+
+S = TypeVar("S", bound="VMState")
+
+
+@dataclasses.dataclass
+class VMState:
+    """The complete state of a single Intcode VM.
+
+    A state can be resumed with :py:meth:`IntcodeOperator.resume`, snapshotted and
+    forked into independent continuations, or serialized and restored later.
+
+    ``input`` is consumed first in, first out. Once it's empty, IN instructions pull
+    the next value from ``source``, if there is one; see :py:mod:`aoc.util.ports`.
+    Snapshots share the source of the state they're taken from.
+    """
+
+    memory: Memory
+    ip: int = 0
+    input: Deque[int] = dataclasses.field(default_factory=collections.deque)
+    outputs: int = 0
+    base: int = 0
+    source: Optional[Callable[[], Optional[int]]] = dataclasses.field(
+        default=None, repr=False, compare=False
+    )
+
+    @property
+    def instruction(self) -> Decoded:
+        return decode(self.memory[self.ip])
+
+    @property
+    def halted(self) -> bool:
+        return self.instruction.code == OpCode.STOP
+
+    @property
+    def blocked(self) -> bool:
+        """Whether this VM is waiting on input which hasn't been provided.
+
+        Pulls the next input from :py:attr:`source` if it needs one.
+        """
+        return self.instruction.code == OpCode.IN and not (self.input or self.fill())
+
+    def fill(self) -> bool:
+        """Pull one value from :py:attr:`source` into :py:attr:`input`, if it has one."""
+        if self.source is None:
+            return False
+        value = self.source()
+        if value is None:
+            return False
+        self.input.append(value)
+        return True
+
+    def snapshot(self: S) -> S:
+        return dataclasses.replace(
+            self, memory=self.memory.copy(), input=collections.deque(self.input)
+        )
+
+    def fork(self: S, n: int = 2) -> List[S]:
+        """Split this state into ``n`` independent continuations."""
+        return [self.snapshot() for _ in range(n)]
+
+    def to_bytes(self) -> bytes:
+        return pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def from_bytes(cls: Type[S], data: bytes) -> S:
+        state = pickle.loads(data)
+        if not isinstance(state, cls):
+            raise TypeError(f"Expected {cls.__name__}, got {type(state).__name__}.")
+        return state
+
+
 T = TypeVar("T")
 
 
 @dataclasses.dataclass
 class IntcodeOperator:
-    array: DefaultDict[int, int]
+    array: Memory
+    decode_cache: bool = False
+    reuse_memory: bool = True
+    compiled: bool = False
+    profile: Optional["Profile"] = dataclasses.field(default=None, compare=False)
+    trace: Optional["Trace"] = dataclasses.field(default=None, compare=False)
+    cache: Optional["ResultCache"] = dataclasses.field(default=None, compare=False)
+    _pool: List[Memory] = dataclasses.field(
+        default_factory=list, init=False, repr=False, compare=False
+    )
+    _compiled: Optional["CompiledProgram"] = dataclasses.field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        if not isinstance(self.array, Memory):
+            self.array = Memory(self.array)
 
     @classmethod
-    def from_iter(cls: Type[T], iterable: Iterable[int]) -> T:
-        array = defaultdict(int, dict([*enumerate(iterable)]))
-        return cls(array)
+    def from_iter(
+        cls: Type[T],
+        iterable: Iterable[int],
+        *,
+        memory: Type[Memory] = Memory,
+        **kwargs,
+    ) -> T:
+        return cls(memory(iterable), **kwargs)
 
     @classmethod
-    def from_str(cls: Type[T], string: str) -> T:
-        return cls.from_iter((int(x) for x in string.strip().split(",")))
+    def from_str(cls: Type[T], string: str, **kwargs) -> T:
+        return cls.from_iter((int(x) for x in string.strip().split(",")), **kwargs)
+
+    @classmethod
+    def from_file(
+        cls: Type[T],
+        path: Union[str, os.PathLike],
+        *,
+        memory: Type[Memory] = Memory,
+        **kwargs,
+    ) -> T:
+        """Load a program from a binary image or a comma-separated text file.
+
+        Text is parsed in chunks, straight into the memory backend. See
+        :py:mod:`aoc.util.image` for the binary format.
+        """
+        from aoc.util import image, parser
+
+        if image.is_image(path):
+            return cls(image.load(path, memory=memory), **kwargs)
+        return cls.from_iter(parser.parse(path), memory=memory, **kwargs)
 
     @staticmethod
     def execute(
-        pos: int, array: DefaultDict[int, int], *, input: List[int] = None
+        pos: int, array: Memory, *, input: List[int] = None
     ) -> Tuple[int, int]:
-        instruction = Instruction.from_str(str(array[pos]))
-        return instruction.execute(pos, array, input=input)
+        state = VMState(array, pos, collections.deque(input or ()))
+        return decode(array[pos]).handler(pos, array, state)
 
-    def run(self, *input: int, debug: bool = False) -> Iterator[Union[int, List[int]]]:
+    def start(self, *input: int, source: ports.SourceT = None) -> VMState:
+        """Create a fresh VM state for this program, which the caller owns.
+
+        ``input`` is consumed in order, and then ``source``.
+        """
+        return VMState(
+            self.array.copy(),
+            input=collections.deque(input),
+            source=ports.source(source),
+        )
+
+    def run(
+        self,
+        *input: int,
+        patch: Mapping[int, int] = None,
+        debug: bool = False,
+        source: ports.SourceT = None,
+    ) -> Iterator[Union[int, Memory]]:
         """Run the program defined by the array of ints and output any results.
 
+        ``input`` is consumed in order, and then ``source``, which may be any iterable
+        or a callable. See :py:mod:`aoc.util.ports`.
+
+        If ``patch`` is provided, it maps addresses to values which are written over
+        the program image before execution starts.
+
         If ``debug`` is True, the final output is the state of the working memory on exit.
+
+        Working memory is checked out of a pool and reset in bulk from :py:attr:`array`,
+        which serves as the pristine program image; it's returned to the pool once the
+        run is finished, unless it was handed to the caller with ``debug``.
+
+        If a :py:attr:`cache` is attached, results are looked up by a hash of the
+        image, ``patch``, ``input`` and ``debug``, and a run is only cached once it's
+        complete. Outputs are then yielded once the run has finished. Runs with a
+        ``source`` aren't cached.
+        """
+        if self.cache is not None and source is None:
+            from aoc.util.cache import digest, key
+
+            k = key(digest(self.array), input, patch, debug)
+            results = self.cache.get(k)
+            if results is None:
+                results = [*self._run(input, patch, debug, None)]
+                self.cache.put(k, results)
+            if debug:
+                *outputs, memory = results
+                yield from outputs
+                # The caller owns the memory it's given.
+                yield memory.copy()
+            else:
+                yield from results
+            return
+        yield from self._run(input, patch, debug, source)
+
+    def _run(
+        self,
+        input: Sequence[int],
+        patch: Optional[Mapping[int, int]],
+        debug: bool,
+        source: Optional[ports.SourceT],
+    ) -> Iterator[Union[int, Memory]]:
+        memory = self._checkout()
+        try:
+            for addr, value in (patch or {}).items():
+                memory[addr] = value
+            state = VMState(
+                memory, input=collections.deque(input), source=ports.source(source)
+            )
+            yield from self.resume(state, pause=False)
+            if debug:
+                owned, memory = memory, None
+                yield owned
+        finally:
+            if memory is not None and self.reuse_memory:
+                self._pool.append(memory)
+
+    def drain(
+        self,
+        sink: ports.SinkT,
+        *input: int,
+        patch: Mapping[int, int] = None,
+        source: ports.SourceT = None,
+    ) -> ports.SinkT:
+        """Run the program to completion, passing each output to ``sink``.
+
+        Returns the sink, so e.g. ``program.drain(Last(), 1).value`` is the final
+        output. See :py:meth:`run` for the other arguments.
+        """
+        for value in self.run(*input, patch=patch, source=source):
+            sink(value)
+        return sink
+
+    def run_many(
+        self,
+        patches: Optional[Iterable[Optional[Mapping[int, int]]]] = None,
+        inputs: Optional[Iterable[Sequence[int]]] = None,
+        **kwargs,
+    ) -> Iterator["BatchResult"]:
+        """Run this program once per patch and/or input vector across a process pool.
+
+        See :py:func:`aoc.util.pool.run_many` for the available options.
+        """
+        from aoc.util.pool import run_many
+
+        return run_many(self, patches, inputs, **kwargs)
+
+    def run_batch(
+        self,
+        patches: Optional[Iterable[Optional[Mapping[int, int]]]] = None,
+        inputs: Optional[Iterable[Sequence[int]]] = None,
+        *,
+        read: Sequence[int] = (),
+    ) -> List["BatchResult"]:
+        """Run this program once per patch and/or input vector, in lockstep with NumPy.
+
+        See :py:func:`aoc.util.batch.run_batch`.
+        """
+        from aoc.util.batch import run_batch
+
+        return run_batch(self, patches, inputs, read=read)
+
+    def analyse(self, *entries: int) -> "Analysis":
+        """Build the control-flow graph of this program's image.
+
+        See :py:func:`aoc.util.analysis.analyse`.
+        """
+        from aoc.util.analysis import analyse
+
+        return analyse(self.array, entries or (0,))
+
+    def symbolic(self, symbols: Mapping[int, str], *input: int) -> "SymbolicResult":
+        """Run this program with the cells in ``symbols`` holding named variables.
+
+        See :py:func:`aoc.util.symbolic.evaluate`.
+        """
+        from aoc.util.symbolic import evaluate
+
+        return evaluate(self, symbols, *input)
+
+    def _checkout(self) -> Memory:
+        if self.reuse_memory and self._pool:
+            memory = self._pool.pop()
+            memory.reset(self.array)
+            return memory
+        return self.array.copy()
+
+    def resume(
+        self, state: VMState, *, steps: int = None, pause: bool = True
+    ) -> Iterator[int]:
+        """Continue executing ``state`` in place and output any results.
+
+        Execution stops when the program halts, after at most ``steps`` instructions,
+        or when an IN instruction has no input. In the latter case the state is left
+        pointing at the IN instruction if ``pause`` is True, so it may be resumed
+        once more input is provided; otherwise :py:class:`InputRequired` is raised.
+
+        If :py:attr:`compiled` is True, the program is compiled to Python on first use
+        and executed via :py:func:`aoc.util.compiler.execute`.
+
+        If a :py:attr:`profile` or a :py:attr:`trace` is attached, every instruction is
+        interpreted and recorded via :py:func:`aoc.util.profiler.execute` or
+        :py:func:`aoc.util.trace.execute` instead.
+        """
+        if self.trace is not None:
+            from aoc.util import trace
+
+            return trace.execute(self, self.trace, state, steps=steps, pause=pause)
+        if self.profile is not None:
+            from aoc.util import profiler
+
+            return profiler.execute(
+                self, self.profile, state, steps=steps, pause=pause
+            )
+        if self.compiled:
+            from aoc.util import compiler
+
+            if self._compiled is None:
+                self._compiled = compiler.compile_program(self.array)
+            return compiler.execute(
+                self, self._compiled, state, steps=steps, pause=pause
+            )
+        return self.interpret(state, steps=steps, pause=pause)
+
+    def interpret(
+        self, state: VMState, *, steps: int = None, pause: bool = True
+    ) -> Iterator[int]:
+        """Execute ``state`` with the interpreter. See :py:meth:`resume`."""
+        memory = state.memory
+        cells = memory.cells
+        pos = state.ip
+        ticks = itertools.repeat(None) if steps is None else range(steps)
+        # Decoded words are always shared across runs; the per-address cache
+        # additionally skips the memory fetch at the cost of tracking writes to code.
+        cache = DecodeCache(memory) if self.decode_cache else None
+        try:
+            for _ in ticks:
+                try:
+                    ins = cache[pos] if cache is not None else decode(cells[pos])
+                    if ins.handler is None:
+                        break
+                    if ins.target and cache is not None:
+                        cache.invalidate(ins.destination(pos, memory, state.base))
+                    res, pos = ins.handler(pos, cells, state)
+                except (IndexError, OverflowError):
+                    res, pos = self._recover(pos, memory, state)
+                    cells = memory.cells
+                except InputRequired:
+                    if pause:
+                        break
+                    raise
+                if res is not None:
+                    state.outputs += 1
+                    yield res
+        finally:
+            state.ip = pos
+
+    @staticmethod
+    def _recover(pos: int, memory: Memory, state: VMState) -> Tuple[Optional[int], int]:
+        """Retry an instruction which ran off the end of memory or overflowed it.
+
+        Handlers only write once every operand has been read, so a failed instruction
+        has had no effect and may be executed again once memory has been fixed up.
         """
-        array = self.array.copy()
-        input = [*input]
-        pos = 0
-        while array[pos] != OpCode.STOP:
-            res, pos = self.execute(pos, array, input=input)
-            if res is not None:
-                yield res
-        if debug:
-            yield array
+        ins = decode(memory[pos])
+        while True:
+            try:
+                return ins.handler(pos, memory.cells, state)
+            except IndexError:
+                size = ins.extent(pos, memory, state.base)
+                if size <= len(memory):
+                    raise
+                memory.reserve(size)
+                if len(memory) < size:
+                    # A sparse memory serves far addresses without growing its buffer.
+                    return ins.handler(pos, memory, state)
+            except OverflowError:
+                memory.promote()
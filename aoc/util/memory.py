@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+import itertools
+import sys
+from array import array
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    MutableSequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
+
+M = TypeVar("M", bound="Memory")
+
+
+class Memory:
+    """A flat, growable Intcode memory backed by a contiguous buffer.
+
+    Reads beyond the end of the buffer are zero-filled and writes beyond it grow the
+    buffer. Hot loops may index :py:attr:`cells` directly, in which case they must
+    handle an :py:class:`IndexError` by calling :py:meth:`reserve` and retrying.
+    """
+
+    __slots__ = ("cells",)
+
+    def __init__(self, cells: Union[Iterable[int], Mapping[int, int]] = ()):
+        if isinstance(cells, Mapping):
+            cells = self._from_mapping(cells)
+        self.cells: MutableSequence[int] = self._buffer(cells)
+
+    @classmethod
+    def from_buffer(cls: Type[M], buffer: memoryview) -> M:
+        """Load a buffer of packed, little-endian, signed 64-bit cells in bulk."""
+        packed = array("q")
+        packed.frombytes(buffer)
+        if sys.byteorder != "little":  # pragma: nocover
+            packed.byteswap()
+        new = cls.__new__(cls)
+        new.cells = cls._adopt(packed)
+        return new
+
+    @staticmethod
+    def _adopt(packed: array) -> MutableSequence[int]:
+        return packed.tolist()
+
+    @staticmethod
+    def _from_mapping(mapping: Mapping[int, int]) -> Iterator[int]:
+        size = max(mapping, default=-1) + 1
+        return (mapping.get(i, 0) for i in range(size))
+
+    @staticmethod
+    def _buffer(cells: Iterable[int]) -> MutableSequence[int]:
+        return [*cells]
+
+    def __getitem__(self, addr: int) -> int:
+        if addr < 0:
+            raise IndexError(f"{addr!r} is not a valid address.")
+        try:
+            return self.cells[addr]
+        except IndexError:
+            return 0
+
+    def __setitem__(self, addr: int, value: int):
+        if addr < 0:
+            raise IndexError(f"{addr!r} is not a valid address.")
+        try:
+            self.cells[addr] = value
+        except IndexError:
+            self.reserve(addr + 1)
+            self[addr] = value
+        except OverflowError:
+            self.promote()
+            self.cells[addr] = value
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.cells)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Memory):
+            return [*self.cells] == [*other.cells]
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({[*self.cells]!r})"
+
+    def keys(self) -> Iterable[int]:
+        return range(len(self.cells))
+
+    def values(self) -> Iterable[int]:
+        return iter(self.cells)
+
+    def items(self) -> Iterable[Tuple[int, int]]:
+        return enumerate(self.cells)
+
+    def copy(self: M) -> M:
+        new = type(self).__new__(type(self))
+        new.cells = self.cells[:]
+        return new
+
+    def reset(self, image: "Memory"):
+        """Restore this memory to the contents of ``image`` in bulk.
+
+        The existing buffer is re-used when it's compatible with the image's, so
+        resetting a pooled memory doesn't allocate.
+        """
+        if type(self.cells) is type(image.cells):
+            self.cells[:] = image.cells
+        else:
+            self.cells = image.cells[:]
+
+    def reserve(self, size: int):
+        """Zero-fill the buffer so that it holds at least ``size`` cells."""
+        missing = size - len(self.cells)
+        if missing > 0:
+            # Grow geometrically so that a program walking off the end doesn't
+            # reallocate on every write.
+            self.cells.extend([0] * max(missing, len(self.cells) // 2))
+
+    def promote(self):
+        """Switch to a buffer which can hold arbitrarily large ints."""
+
+
+class CompactMemory(Memory):
+    """A flat memory backed by a signed 64-bit ``array``.
+
+    The buffer transparently falls back to a list of Python ints the first time a
+    value which doesn't fit in 64 bits is stored.
+    """
+
+    __slots__ = ()
+
+    @staticmethod
+    def _buffer(cells: Iterable[int]) -> MutableSequence[int]:
+        # Pack in batches, so a streamed program is never held as a list as well.
+        cells = iter(cells)
+        packed = array("q")
+        for batch in iter(lambda: [*itertools.islice(cells, 4096)], []):
+            try:
+                packed.extend(array("q", batch))
+            except OverflowError:
+                return [*packed, *batch, *cells]
+        return packed
+
+    @staticmethod
+    def _adopt(packed: array) -> MutableSequence[int]:
+        return packed
+
+    def promote(self):
+        if isinstance(self.cells, array):
+            self.cells = [*self.cells]
+
+
+
+
+class PagedMemory(Memory):
+    """A flat memory which keeps addresses far beyond its buffer in sparse pages.
+
+    Writes just past the end of the buffer grow it, as with :py:class:`Memory`, but
+    an address more than the buffer's own length (or a page) beyond it lives in a
+    fixed-size, dense page which is allocated on first write. A program which touches
+    a handful of scattered, very high addresses then needs a handful of pages rather
+    than a buffer which spans all of them, while its hot loops still run against the
+    flat buffer.
+
+    Hot loops which index :py:attr:`cells` directly must fall back to indexing the
+    memory itself for addresses which :py:meth:`reserve` doesn't bring into the buffer.
+    Iteration and :py:func:`len` only cover the buffer.
+    """
+
+    __slots__ = ("pages",)
+
+    SHIFT = 12
+    PAGE = 1 << SHIFT
+
+    def __init__(self, cells: Union[Iterable[int], Mapping[int, int]] = ()):
+        super().__init__(cells)
+        self.pages: Dict[int, List[int]] = {}
+
+    @classmethod
+    def from_buffer(cls: Type[M], buffer: memoryview) -> M:
+        new = super().from_buffer(buffer)
+        new.pages = {}
+        return new
+
+    def __getitem__(self, addr: int) -> int:
+        if addr < 0:
+            raise IndexError(f"{addr!r} is not a valid address.")
+        try:
+            return self.cells[addr]
+        except IndexError:
+            page = self.pages.get(addr >> self.SHIFT)
+            return 0 if page is None else page[addr & (self.PAGE - 1)]
+
+    def __setitem__(self, addr: int, value: int):
+        if addr < 0:
+            raise IndexError(f"{addr!r} is not a valid address.")
+        if addr >= len(self.cells):
+            self.reserve(addr + 1)
+        if addr < len(self.cells):
+            self.cells[addr] = value
+            return
+        key = addr >> self.SHIFT
+        page = self.pages.get(key)
+        if page is None:
+            page = self.pages[key] = [0] * self.PAGE
+        page[addr & (self.PAGE - 1)] = value
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, PagedMemory):
+            return super().__eq__(other) and self.pages == other.pages
+        return super().__eq__(other)
+
+    def copy(self: M) -> M:
+        new = super().copy()
+        new.pages = {k: p[:] for k, p in self.pages.items()}
+        return new
+
+    def reset(self, image: Memory):
+        super().reset(image)
+        self.pages = {k: p[:] for k, p in getattr(image, "pages", {}).items()}
+
+    def reserve(self, size: int):
+        """Grow the buffer to hold ``size`` cells, unless that's far beyond its end."""
+        old = len(self.cells)
+        if size - old > max(old, self.PAGE):
+            return
+        super().reserve(size)
+        new = len(self.cells)
+        # Move any pages the buffer now overlaps into it.
+        for key in range(old >> self.SHIFT, ((new - 1) >> self.SHIFT) + 1):
+            page = self.pages.get(key)
+            if page is None:
+                continue
+            start = key << self.SHIFT
+            lo, hi = max(start, old), min(start + self.PAGE, new)
+            self.cells[lo:hi] = page[lo - start : hi - start]
+            if hi == start + self.PAGE:
+                del self.pages[key]
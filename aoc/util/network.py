@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""Run many Intcode VMs concurrently in a single asyncio event loop.
+
+Each VM is a task whose IN instruction awaits its inbox and whose OUT instruction
+puts to the inbox of every node it's connected to. VMs yield to the event loop after
+every ``quantum`` instructions, or whenever they're blocked on input.
+"""
+import asyncio
+import dataclasses
+from typing import List, Optional, Sequence
+
+from aoc.util.intcode import IntcodeOperator, VMState
+
+
+class Deadlock(RuntimeError):
+    """Raised when every live node in a network is waiting on input which can't arrive."""
+
+
+@dataclasses.dataclass
+class Node:
+    program: IntcodeOperator
+    state: VMState
+    targets: List["Node"] = dataclasses.field(default_factory=list)
+    last: Optional[int] = None
+    inbox: Optional[asyncio.Queue] = dataclasses.field(default=None, repr=False)
+
+    @property
+    def halted(self) -> bool:
+        return self.state.halted
+
+
+class Network:
+    """A topology of Intcode VMs which communicate over asyncio queues."""
+
+    def __init__(self, *, quantum: int = 1000):
+        self.quantum = quantum
+        self.nodes: List[Node] = []
+        self._idle = 0
+        self._pending = 0
+        self._quiescent: Optional[asyncio.Future] = None
+
+    def add(self, program: IntcodeOperator, *input: int) -> Node:
+        node = Node(program, program.start(*input))
+        self.nodes.append(node)
+        return node
+
+    def connect(self, source: Node, target: Node):
+        """Send every output of ``source`` to the input of ``target``."""
+        source.targets.append(target)
+
+    def send(self, node: Node, value: int):
+        if not node.halted:
+            self._pending += 1
+        node.inbox.put_nowait(value)
+
+    async def _receive(self, node: Node) -> int:
+        self._idle += 1
+        self._check()
+        try:
+            value = await node.inbox.get()
+        finally:
+            self._idle -= 1
+        self._pending -= 1
+        return value
+
+    def _check(self):
+        # Every node is halted or waiting, and nothing is in flight to wake them.
+        if (
+            self._idle == len(self.nodes)
+            and self._pending == 0
+            and not self._quiescent.done()
+        ):
+            self._quiescent.set_result(None)
+
+    async def _drive(self, node: Node):
+        program, state, quantum = node.program, node.state, self.quantum
+        try:
+            while True:
+                for value in program.resume(state, steps=quantum):
+                    node.last = value
+                    for target in node.targets:
+                        self.send(target, value)
+                if state.halted:
+                    break
+                if state.blocked:
+                    state.input.append(await self._receive(node))
+                else:
+                    await asyncio.sleep(0)
+        except Exception as e:
+            if not self._quiescent.done():
+                self._quiescent.set_exception(e)
+            return
+        # Anything left in a halted node's inbox can never be consumed.
+        self._pending -= node.inbox.qsize()
+        self._idle += 1
+        self._check()
+
+    async def run(self):
+        """Run every node until they've all halted.
+
+        Raises :py:class:`Deadlock` if the remaining nodes are all waiting on input.
+        """
+        loop = asyncio.get_event_loop()
+        self._quiescent = loop.create_future()
+        self._idle = self._pending = 0
+        for node in self.nodes:
+            node.inbox = asyncio.Queue()
+        tasks = [loop.create_task(self._drive(n)) for n in self.nodes]
+        self._check()
+        try:
+            await self._quiescent
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        waiting = sum(not n.halted for n in self.nodes)
+        if waiting:
+            raise Deadlock(f"{waiting} node(s) are waiting on input.")
+
+
+async def chain(
+    program: IntcodeOperator,
+    phases: Sequence[int],
+    signal: int = 0,
+    *,
+    feedback: bool = False,
+    quantum: int = 1000,
+) -> int:
+    """Run a chain of amplifiers, one per phase setting, and get the final signal.
+
+    Each amplifier runs its own copy of ``program``. If ``feedback`` is True, the last
+    amplifier's output is wired back into the first.
+    """
+    network = Network(quantum=quantum)
+    nodes = [network.add(program, phase) for phase in phases]
+    for source, target in zip(nodes, nodes[1:]):
+        network.connect(source, target)
+    if feedback:
+        network.connect(nodes[-1], nodes[0])
+    nodes[0].state.input.append(signal)
+    await network.run()
+    return nodes[-1].last
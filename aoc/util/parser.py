@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""Streaming parser for comma-separated Intcode programs.
+
+The source is read in fixed-size chunks and parsed into ints as it goes, so a memory
+backend can be filled from a file of any size without ever holding its text (or a
+list of its fields) in full.
+"""
+import os
+from typing import IO, AnyStr, Iterator, Union
+
+CHUNKSIZE = 1 << 16
+
+SourceT = Union[str, os.PathLike, IO[str], IO[bytes]]
+
+
+def parse(source: SourceT, *, chunksize: int = CHUNKSIZE) -> Iterator[int]:
+    """Lazily parse the cells of a program from a path or an open file.
+
+    Files may be opened in text or binary mode. Whitespace around each value is
+    ignored, as is a trailing comma.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            yield from parse(f, chunksize=chunksize)
+        return
+    yield from _split(source, chunksize)
+
+
+def _split(f: IO[AnyStr], chunksize: int) -> Iterator[int]:
+    tail = None
+    chunk = f.read(chunksize)
+    comma = b"," if isinstance(chunk, bytes) else ","
+    while chunk:
+        fields = (tail + chunk if tail else chunk).split(comma)
+        # The last field may continue into the next chunk.
+        tail = fields.pop()
+        yield from map(int, fields)
+        chunk = f.read(chunksize)
+    if tail and tail.strip():
+        yield int(tail)
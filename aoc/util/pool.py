@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""Run one Intcode program many times over a process pool.
+
+The program image is placed in shared memory once and every worker copies it out
+when it starts, so each task only needs to carry its patch and input vector.
+"""
+import dataclasses
+import itertools
+import multiprocessing
+import os
+from array import array
+from multiprocessing import shared_memory
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
+
+from aoc.util.intcode import IntcodeOperator
+from aoc.util.memory import Memory
+
+
+class BatchResult(NamedTuple):
+    """The outcome of a single run in a batch.
+
+    ``index`` is the position of the run in submission order and ``cells`` holds the
+    final values of the addresses requested with ``read``.
+    """
+
+    index: int
+    outputs: List[int]
+    cells: Tuple[int, ...]
+
+
+Job = Tuple[int, Optional[Mapping[int, int]], Sequence[int]]
+
+_WORKER: Optional[IntcodeOperator] = None
+_READ: Tuple[int, ...] = ()
+
+
+def _init(
+    cls: Type[IntcodeOperator],
+    memory: Type[Memory],
+    options: Dict[str, Any],
+    read: Tuple[int, ...],
+    name: Optional[str],
+    image: Optional[List[int]],
+):
+    global _WORKER, _READ
+    if name is not None:
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            cells = shm.buf.cast("q").tolist()
+        finally:
+            shm.close()
+    else:
+        cells = image
+    _WORKER = cls(memory(cells), **options)
+    _READ = read
+
+
+def _execute(job: Job) -> BatchResult:
+    return execute(_WORKER, job, _READ)
+
+
+def execute(
+    program: IntcodeOperator, job: Job, read: Sequence[int] = ()
+) -> BatchResult:
+    """Run a single job from a batch in the current process."""
+    index, patch, input = job
+    outputs = [*program.run(*input, patch=patch, debug=bool(read))]
+    cells: Tuple[int, ...] = ()
+    if read:
+        memory = outputs.pop()
+        cells = tuple(memory[a] for a in read)
+    return BatchResult(index, outputs, cells)
+
+
+def _share(image: Memory) -> Optional[shared_memory.SharedMemory]:
+    try:
+        packed = array("q", image.cells)
+    except OverflowError:
+        return None
+    shm = shared_memory.SharedMemory(create=True, size=max(len(packed), 1) * 8)
+    shm.buf[: len(packed) * 8] = packed.tobytes()
+    return shm
+
+
+def _jobs(
+    patches: Optional[Iterable[Optional[Mapping[int, int]]]],
+    inputs: Optional[Iterable[Sequence[int]]],
+) -> Iterator[Job]:
+    if patches is None and inputs is None:
+        raise ValueError("At least one of 'patches' or 'inputs' must be provided.")
+    patches = itertools.repeat(None) if patches is None else patches
+    inputs = itertools.repeat(()) if inputs is None else inputs
+    for index, (patch, input) in enumerate(zip(patches, inputs)):
+        yield index, patch, input
+
+
+def run_many(
+    program: IntcodeOperator,
+    patches: Optional[Iterable[Optional[Mapping[int, int]]]] = None,
+    inputs: Optional[Iterable[Sequence[int]]] = None,
+    *,
+    workers: int = None,
+    ordered: bool = True,
+    read: Sequence[int] = (),
+    chunksize: int = 64,
+) -> Iterator[BatchResult]:
+    """Run ``program`` once per patch and/or input vector and stream the results.
+
+    ``patches`` and ``inputs`` are zipped together; if only one is provided, the
+    other defaults to no patch or no input for every run. Results are yielded in
+    submission order if ``ordered`` is True, otherwise as they complete.
+
+    If ``workers`` is 1, every run happens in the current process.
+    """
+    jobs = _jobs(patches, inputs)
+    read = tuple(read)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        yield from (execute(program, job, read) for job in jobs)
+        return
+
+    shm = _share(program.array)
+    options = {
+        f.name: getattr(program, f.name)
+        for f in dataclasses.fields(program)
+        if f.init and f.name != "array"
+    }
+    initargs = (
+        type(program),
+        type(program.array),
+        options,
+        read,
+        shm.name if shm else None,
+        # Images which don't fit in 64 bits are pickled to each worker instead.
+        None if shm else [*program.array],
+    )
+    pool = multiprocessing.Pool(workers, initializer=_init, initargs=initargs)
+    try:
+        imap = pool.imap if ordered else pool.imap_unordered
+        yield from imap(_execute, jobs, chunksize=chunksize)
+    finally:
+        pool.terminate()
+        pool.join()
+        if shm is not None:
+            shm.close()
+            shm.unlink()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""Input sources and output sinks for Intcode VMs.
+
+A VM's pending input is a FIFO :py:class:`collections.deque`, which may be backed by
+a source: any iterable, or a callable which returns the next value (or ``None`` if
+there isn't one yet). The source is only drawn from when an IN instruction finds the
+deque empty, so input may be produced lazily, one value at a time.
+
+On the other side, a sink is any callable which takes each output in turn. Besides
+``list.append``, :py:class:`Last` keeps only the latest output and :py:class:`Ring`
+the latest ``maxlen``, so a program which emits millions of outputs can be run in
+constant memory.
+"""
+import collections
+import functools
+from typing import Any, Callable, Iterable, Optional, Union
+
+SourceT = Union[Iterable[int], Callable[[], Optional[int]]]
+SinkT = Callable[[int], Any]
+
+
+def source(feed: Optional[SourceT]) -> Optional[Callable[[], Optional[int]]]:
+    """Adapt an iterable or a callable into a function which pulls the next input."""
+    if feed is None or callable(feed):
+        return feed
+    return functools.partial(next, iter(feed), None)
+
+
+class Last:
+    """A sink which keeps only the most recent output, or ``None`` before the first."""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value: Optional[int] = None
+
+    def __call__(self, value: int):
+        self.value = value
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.value!r})"
+
+
+class Ring(collections.deque):
+    """A sink which keeps the most recent ``maxlen`` outputs, oldest first."""
+
+    def __init__(self, maxlen: int):
+        super().__init__(maxlen=maxlen)
+
+    def __call__(self, value: int):
+        self.append(value)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""Opt-in profiling of Intcode programs.
+
+A :py:class:`Profile` attached to an :py:class:`~aoc.util.intcode.IntcodeOperator`
+routes execution through :py:func:`execute`, which steps the interpreter one
+instruction at a time and records what each one does. Without a profile, the
+interpreter runs untouched.
+"""
+import collections
+import dataclasses
+import json
+from typing import TYPE_CHECKING, Any, Counter, Dict, Iterator
+
+from aoc.util.intcode import JUMP, OPERATIONS, OpCode, ParamMode, VMState, decode
+from aoc.util.memory import Memory
+
+if TYPE_CHECKING:  # pragma: nocover
+    from aoc.util.intcode import IntcodeOperator
+
+
+@dataclasses.dataclass
+class Profile:
+    """Counts of what a program did, accumulated across every run it's attached to.
+
+    ``reads`` and ``writes`` count operand accesses by address, not instruction
+    fetches. ``taken`` and ``skipped`` count the outcome of JIT/JIF by address.
+    """
+
+    opcodes: Counter[OpCode] = dataclasses.field(default_factory=collections.Counter)
+    addresses: Counter[int] = dataclasses.field(default_factory=collections.Counter)
+    reads: Counter[int] = dataclasses.field(default_factory=collections.Counter)
+    writes: Counter[int] = dataclasses.field(default_factory=collections.Counter)
+    taken: Counter[int] = dataclasses.field(default_factory=collections.Counter)
+    skipped: Counter[int] = dataclasses.field(default_factory=collections.Counter)
+
+    @property
+    def instructions(self) -> int:
+        return sum(self.opcodes.values())
+
+    def record(self, pos: int, memory: Memory, base: int = 0):
+        """Record the instruction at ``pos``, which is about to be executed."""
+        ins = decode(memory[pos])
+        self.opcodes[ins.code] += 1
+        self.addresses[pos] += 1
+        params = [memory[pos + i] for i in range(1, ins.size)]
+        addrs = [
+            base + p if m == ParamMode.REL else p for m, p in zip(ins.modes, params)
+        ]
+        for i, (mode, addr) in enumerate(zip(ins.modes, addrs), start=1):
+            if i == ins.target:
+                self.writes[addr] += 1
+            elif mode != ParamMode.IMM:
+                self.reads[addr] += 1
+        if ins.code in JUMP:
+            mode, addr = ins.modes[0], addrs[0]
+            cond = addr if mode == ParamMode.IMM else memory[addr]
+            taken = OPERATIONS[ins.code]["op"](cond)
+            (self.taken if taken else self.skipped)[pos] += 1
+
+    def clear(self):
+        for field in dataclasses.fields(self):
+            getattr(self, field.name).clear()
+
+    def to_dict(self) -> Dict[str, Any]:
+        jumps = sorted({*self.taken, *self.skipped})
+        return {
+            "instructions": self.instructions,
+            "opcodes": {c.name: n for c, n in self.opcodes.most_common()},
+            "addresses": dict(sorted(self.addresses.items())),
+            "reads": dict(sorted(self.reads.items())),
+            "writes": dict(sorted(self.writes.items())),
+            "jumps": {
+                a: {"taken": self.taken[a], "skipped": self.skipped[a]} for a in jumps
+            },
+        }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+
+def execute(
+    program: "IntcodeOperator",
+    profile: Profile,
+    state: VMState,
+    *,
+    steps: int = None,
+    pause: bool = True,
+) -> Iterator[int]:
+    """Execute ``state`` one instruction at a time, recording each in ``profile``."""
+    memory = state.memory
+    while steps is None or steps > 0:
+        ins = decode(memory[state.ip])
+        # Don't record instructions which the interpreter won't execute.
+        if ins.code == OpCode.STOP or state.blocked:
+            yield from program.interpret(state, steps=1, pause=pause)
+            break
+        profile.record(state.ip, memory, state.base)
+        yield from program.interpret(state, steps=1, pause=pause)
+        if steps is not None:
+            steps -= 1
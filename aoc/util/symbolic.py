@@ -0,0 +1,333 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""Symbolic execution of Intcode programs.
+
+Chosen memory cells start out holding named variables rather than numbers. ADD and
+MUL build up polynomials over those variables, so after a single run every cell and
+output is expressed in terms of the inputs. This only works so long as the program
+never needs to know a symbol's value: an opcode, a write address, a comparison or a
+jump condition which depends on a symbol raises :py:class:`SymbolicDependence`.
+
+The resulting expressions can be inverted with :py:func:`solve`, e.g. to find the
+noun and verb which produce a given value at address 0 without trying every pair.
+"""
+import collections
+import dataclasses
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from aoc.util.intcode import (
+    COMPUTE,
+    FLIP,
+    JUMP,
+    OPERATIONS,
+    InputRequired,
+    OpCode,
+    ParamMode,
+    decode,
+)
+from aoc.util.memory import Memory
+
+if TYPE_CHECKING:  # pragma: nocover
+    from aoc.util.intcode import IntcodeOperator
+
+# A monomial is a sorted tuple of (variable, exponent) pairs; () is the constant term.
+Monomial = Tuple[Tuple[str, int], ...]
+
+
+class Poly:
+    """An immutable polynomial with integer coefficients over named variables."""
+
+    __slots__ = ("terms",)
+
+    def __init__(self, terms: Mapping[Monomial, int] = None):
+        self.terms: Dict[Monomial, int] = {
+            m: c for m, c in (terms or {}).items() if c
+        }
+
+    @classmethod
+    def var(cls, name: str, exp: int = 1) -> "Poly":
+        return cls({((name, exp),): 1})
+
+    @staticmethod
+    def _lift(other: "Value") -> "Poly":
+        return other if isinstance(other, Poly) else Poly({(): other})
+
+    def __add__(self, other: "Value") -> "Value":
+        terms = dict(self.terms)
+        for m, c in self._lift(other).terms.items():
+            terms[m] = terms.get(m, 0) + c
+        return simplify(Poly(terms))
+
+    __radd__ = __add__
+
+    def __mul__(self, other: "Value") -> "Value":
+        terms: Dict[Monomial, int] = {}
+        for m1, c1 in self.terms.items():
+            for m2, c2 in self._lift(other).terms.items():
+                powers = dict(m1)
+                for name, exp in m2:
+                    powers[name] = powers.get(name, 0) + exp
+                m = tuple(sorted(powers.items()))
+                terms[m] = terms.get(m, 0) + c1 * c2
+        return simplify(Poly(terms))
+
+    __rmul__ = __mul__
+
+    def __neg__(self) -> "Poly":
+        return Poly({m: -c for m, c in self.terms.items()})
+
+    def __sub__(self, other: "Value") -> "Value":
+        return self + -self._lift(other)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (Poly, int)):
+            return self.terms == self._lift(other).terms
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(frozenset(self.terms.items()))
+
+    def __repr__(self) -> str:
+        if not self.terms:
+            return "0"
+        parts = []
+        for m, c in sorted(self.terms.items(), key=lambda t: (-self._degree(t[0]), t)):
+            factors = [n if e == 1 else f"{n}**{e}" for n, e in m]
+            if c != 1 or not factors:
+                factors.insert(0, repr(c))
+            parts.append("*".join(factors))
+        return " + ".join(parts)
+
+    @staticmethod
+    def _degree(monomial: Monomial) -> int:
+        return sum(e for _, e in monomial)
+
+    @property
+    def degree(self) -> int:
+        return max((self._degree(m) for m in self.terms), default=0)
+
+    @property
+    def variables(self) -> Tuple[str, ...]:
+        return tuple(sorted({n for m in self.terms for n, _ in m}))
+
+    def coefficient(self, name: str = None) -> int:
+        """The coefficient of the linear term in ``name``, or the constant term."""
+        return self.terms.get(((name, 1),) if name else (), 0)
+
+    def substitute(self, values: Mapping[str, int]) -> "Value":
+        """Replace any variables found in ``values`` with their value."""
+        out: Value = 0
+        for m, c in self.terms.items():
+            term: Value = c
+            for name, exp in m:
+                if name in values:
+                    term = term * values[name] ** exp
+                else:
+                    term = term * Poly.var(name, exp)
+            out = out + term
+        return out
+
+
+Value = Union[int, Poly]
+
+
+def simplify(value: Value) -> Value:
+    """Collapse a polynomial with no variables down to a plain int."""
+    if isinstance(value, Poly) and not value.variables:
+        return value.coefficient()
+    return value
+
+
+class SymbolicDependence(RuntimeError):
+    """Raised when execution depends on the value of a symbol.
+
+    ``ip`` is the address of the offending instruction and ``value`` is the
+    expression which would have been needed as a concrete number.
+    """
+
+    def __init__(self, ip: int, what: str, value: Poly):
+        super().__init__(f"The {what} at {ip} depends on {value!r}.")
+        self.ip = ip
+        self.value = value
+
+
+@dataclasses.dataclass
+class SymbolicResult:
+    """The final memory and outputs of a symbolic run, in terms of its symbols."""
+
+    memory: Memory
+    outputs: List[Value]
+
+
+def _concrete(ip: int, what: str, value: Value) -> int:
+    if isinstance(value, Poly):
+        raise SymbolicDependence(ip, what, value)
+    return value
+
+
+def _load(memory: Memory, addr: Value) -> Value:
+    # The cell behind a symbolic address can't be known, but it only matters if the
+    # value is used, so it's represented by an opaque variable named after the load.
+    return Poly.var(f"[{addr!r}]") if isinstance(addr, Poly) else memory[addr]
+
+
+def evaluate(
+    program: "IntcodeOperator", symbols: Mapping[int, str], *input: int
+) -> SymbolicResult:
+    """Run ``program`` with the cells in ``symbols`` replaced by named variables.
+
+    Raises :py:class:`SymbolicDependence` if an opcode, the address of a write, a
+    comparison, a jump condition or the relative base depends on a symbol. Reads from
+    a symbolic address result in an opaque variable, e.g. ``[noun]``, which can't be
+    solved for.
+    """
+    # A list-backed memory, so that cells may hold polynomials.
+    memory = Memory(program.array)
+    for addr, name in symbols.items():
+        memory[addr] = Poly.var(name)
+    input = collections.deque(input)
+    outputs: List[Value] = []
+    ip = base = 0
+    while True:
+        ins = decode(_concrete(ip, "opcode", memory[ip]))
+        if ins.code == OpCode.STOP:
+            break
+        params = [memory[ip + i] for i in range(1, ins.size)]
+        addrs = [
+            base + p if m == ParamMode.REL else p for m, p in zip(ins.modes, params)
+        ]
+        args = [
+            p if m == ParamMode.IMM else _load(memory, p)
+            for i, (m, p) in enumerate(zip(ins.modes, addrs), start=1)
+            if i != ins.target
+        ]
+        target = _concrete(ip, "address", addrs[ins.target - 1]) if ins.target else None
+        nxt = ip + ins.size
+        if ins.code in COMPUTE:
+            memory[target] = OPERATIONS[ins.code]["op"](*args)
+        elif ins.code in FLIP:
+            a, b = (_concrete(ip, "comparison", a) for a in args)
+            memory[target] = int(OPERATIONS[ins.code]["op"](a, b))
+        elif ins.code in JUMP:
+            cond, dest = args
+            if OPERATIONS[ins.code]["op"](_concrete(ip, "jump condition", cond)):
+                nxt = _concrete(ip, "jump target", dest)
+        elif ins.code == OpCode.IN:
+            if not input:
+                raise InputRequired(f"{ins.code}: can't proceed without input.")
+            memory[target] = input.popleft()
+        elif ins.code == OpCode.ARB:
+            base += _concrete(ip, "relative base", args[0])
+        else:
+            outputs.append(args[0])
+        ip = nxt
+    return SymbolicResult(memory, outputs)
+
+
+def solve(
+    expr: Value, target: int, bounds: Mapping[str, range]
+) -> Optional[Dict[str, int]]:
+    """Find the first assignment of the variables in ``bounds`` for ``expr == target``.
+
+    Assignments are ordered lexicographically, in the order of ``bounds``, so the
+    result is the same as that of nested loops over each range. Expressions which are
+    linear in their last two variables are solved in constant time for those
+    variables, however large their ranges; anything else falls back to a search.
+    """
+    residual = Poly._lift(expr) - target
+    names = [*bounds]
+    unbound = set(residual.variables if isinstance(residual, Poly) else ()) - set(names)
+    if unbound:
+        raise ValueError(f"No bounds given for {', '.join(sorted(unbound))}.")
+    if any(bounds[n].step != 1 for n in names):
+        raise ValueError("Only contiguous ranges are supported.")
+    if not all(bounds[n] for n in names):
+        return None
+    return _search(residual, names, bounds)
+
+
+def _search(
+    residual: Value, names: Sequence[str], bounds: Mapping[str, range]
+) -> Optional[Dict[str, int]]:
+    used = [n for n in names if isinstance(residual, Poly) and n in residual.variables]
+    # Anything which doesn't appear in the expression takes its smallest value.
+    free = {n: bounds[n].start for n in names if n not in used}
+    if not used:
+        return free if residual == 0 else None
+    if residual.degree == 1 and len(used) <= 2:
+        found = _linear(residual, used, bounds)
+    elif len(used) == 1:
+        (name,) = used
+        found = next(
+            ({name: x} for x in bounds[name] if residual.substitute({name: x}) == 0),
+            None,
+        )
+    else:
+        first, rest = used[0], used[1:]
+        found = next(
+            (
+                {first: x, **sol}
+                for x in bounds[first]
+                for sol in (_search(residual.substitute({first: x}), rest, bounds),)
+                if sol is not None
+            ),
+            None,
+        )
+    return None if found is None else {n: {**free, **found}[n] for n in names}
+
+
+def _interval(lo: int, hi: int, base: int, step: int) -> Tuple[int, int]:
+    """The values of ``t`` for which ``lo <= base + step * t <= hi``."""
+    if step < 0:
+        lo, hi = hi, lo
+    return -((base - lo) // step), (hi - base) // step
+
+
+def _linear(
+    residual: Poly, used: Sequence[str], bounds: Mapping[str, range]
+) -> Optional[Dict[str, int]]:
+    """Solve ``a * x (+ b * y) + c == 0`` over ``bounds`` in closed form."""
+    c = residual.coefficient()
+    if len(used) == 1:
+        (x,) = used
+        a = residual.coefficient(x)
+        value = -c // a
+        return {x: value} if a * value == -c and value in bounds[x] else None
+    x, y = used
+    a, b = residual.coefficient(x), residual.coefficient(y)
+    g, p, q = _egcd(a, b)
+    if c % g:
+        return None
+    # Every solution is (x0 + B * t, y0 - A * t) for some integer t.
+    k = -c // g
+    x0, y0, A, B = p * k, q * k, a // g, b // g
+    xr, yr = bounds[x], bounds[y]
+    lo1, hi1 = _interval(xr.start, xr.stop - 1, x0, B)
+    lo2, hi2 = _interval(yr.start, yr.stop - 1, y0, -A)
+    lo, hi = max(lo1, lo2), min(hi1, hi2)
+    if lo > hi:
+        return None
+    # Pick the solution with the smallest x, which is unique since B != 0.
+    t = lo if B > 0 else hi
+    return {x: x0 + B * t, y: y0 - A * t}
+
+
+def _egcd(a: int, b: int) -> Tuple[int, int, int]:
+    """Find ``g, p, q`` such that ``a * p + b * q == g == gcd(a, b)`` and ``g > 0``."""
+    p0, p1, q0, q1 = 1, 0, 0, 1
+    while b:
+        n, (a, b) = a // b, (b, a % b)
+        p0, p1 = p1, p0 - n * p1
+        q0, q1 = q1, q0 - n * q1
+    if a < 0:
+        a, p0, q0 = -a, -p0, -q0
+    return a, p0, q0
@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""A compact, binary record of every instruction a program executes.
+
+Each executed instruction is packed into a fixed-width record of six signed 64-bit
+ints: its address, opcode word, three raw parameters (zero-filled) and its result,
+which is the value written for ADD/MUL/IN/FLT/FEQ, the value sent for OUT, the next
+address for JIT/JIF and the new relative base for ARB. Results which don't fit in 64
+bits are truncated.
+
+Records are written into a ring buffer of a fixed capacity, held either in memory or
+in a memory-mapped file, so a trace of any length uses bounded memory and keeps the
+most recent records. A file written by :py:class:`Trace` can be read back lazily with
+:py:meth:`Trace.open`.
+"""
+import itertools
+import mmap
+import pathlib
+import struct
+from typing import (
+    TYPE_CHECKING,
+    Iterator,
+    NamedTuple,
+    Union,
+)
+
+from aoc.util.intcode import JUMP, InputRequired, OpCode, VMState, decode
+
+if TYPE_CHECKING:  # pragma: nocover
+    from aoc.util.intcode import IntcodeOperator
+
+MAGIC = b"ICTR"
+VERSION = 1
+HEADER = struct.Struct("<4sIIqq4x")
+RECORD = struct.Struct("<6q")
+
+_MASK = (1 << 64) - 1
+
+
+class Step(NamedTuple):
+    ip: int
+    word: int
+    a: int
+    b: int
+    c: int
+    result: int
+
+    @property
+    def code(self) -> OpCode:
+        return OpCode(self.word % 100)
+
+
+def _wrap(value: int) -> int:
+    value &= _MASK
+    return value - (1 << 64) if value >> 63 else value
+
+
+class Trace:
+    """A ring buffer of fixed-width execution records.
+
+    If ``path`` is provided, the buffer is a memory-mapped file of that name which is
+    created (or truncated) to hold ``capacity`` records.
+    """
+
+    def __init__(
+        self, capacity: int = 1 << 20, *, path: Union[str, pathlib.Path] = None
+    ):
+        if capacity < 1:
+            raise ValueError(f"Capacity must be positive, got {capacity!r}.")
+        self.capacity = capacity
+        self.count = 0
+        self.path = path
+        size = HEADER.size + capacity * RECORD.size
+        if path is None:
+            self._file = None
+            self._buffer: Union[bytearray, mmap.mmap] = bytearray(size)
+        else:
+            self._file = open(path, "w+b")
+            self._file.truncate(size)
+            self._buffer = mmap.mmap(self._file.fileno(), size)
+        self._sync()
+
+    @classmethod
+    def open(cls, path: Union[str, pathlib.Path]) -> "Trace":
+        """Open a trace file which was written by :py:class:`Trace` for reading."""
+        trace = cls.__new__(cls)
+        trace.path = path
+        trace._file = open(path, "rb")
+        trace._buffer = mmap.mmap(trace._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, size, capacity, count = HEADER.unpack_from(trace._buffer)
+        if magic != MAGIC or version != VERSION or size != RECORD.size:
+            trace.close()
+            raise ValueError(f"{path!s} is not a version {VERSION} Intcode trace.")
+        trace.capacity, trace.count = capacity, count
+        return trace
+
+    def _sync(self):
+        HEADER.pack_into(
+            self._buffer, 0, MAGIC, VERSION, RECORD.size, self.capacity, self.count
+        )
+
+    def append(self, ip: int, word: int, a: int, b: int, c: int, result: int):
+        offset = HEADER.size + (self.count % self.capacity) * RECORD.size
+        try:
+            RECORD.pack_into(self._buffer, offset, ip, word, a, b, c, result)
+        except struct.error:
+            args = (_wrap(v) for v in (ip, word, a, b, c, result))
+            RECORD.pack_into(self._buffer, offset, *args)
+        self.count += 1
+
+    @property
+    def dropped(self) -> int:
+        """The number of records which have been overwritten by newer ones."""
+        return max(self.count - self.capacity, 0)
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def __iter__(self) -> Iterator[Step]:
+        """Lazily iterate over the retained records, oldest first."""
+        start = self.dropped
+        for i in range(start, start + len(self)):
+            offset = HEADER.size + (i % self.capacity) * RECORD.size
+            yield Step(*RECORD.unpack_from(self._buffer, offset))
+
+    def flush(self):
+        """Write the record count out, so the buffer can be read back."""
+        if self._file is not None and self._file.mode != "rb":
+            self._sync()
+            self._buffer.flush()
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._buffer.close()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "Trace":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def execute(
+    program: "IntcodeOperator",
+    trace: Trace,
+    state: VMState,
+    *,
+    steps: int = None,
+    pause: bool = True,
+) -> Iterator[int]:
+    """Execute ``state`` with the interpreter, appending each instruction to ``trace``.
+
+    If ``program`` also has a profile attached, every instruction is recorded there
+    as well.
+    """
+    memory = state.memory
+    cells = memory.cells
+    profile = program.profile
+    pos = state.ip
+    ticks = itertools.repeat(None) if steps is None else range(steps)
+    try:
+        for _ in ticks:
+            ins = decode(memory[pos])
+            if ins.handler is None:
+                break
+            if ins.code == OpCode.IN and not (state.input or state.fill()):
+                if pause:
+                    break
+                raise InputRequired(f"{ins.code}: can't proceed without input.")
+            # Parameters past the end of memory read as 0, as does the padding.
+            a, b, c = (*cells[pos + 1 : pos + ins.size], 0, 0, 0)[:3]
+            if profile is not None:
+                profile.record(pos, memory, state.base)
+            try:
+                res, nxt = ins.handler(pos, cells, state)
+            except (IndexError, OverflowError):
+                res, nxt = program._recover(pos, memory, state)
+                cells = memory.cells
+            if ins.target:
+                result = memory[ins.destination(pos, memory, state.base)]
+            elif res is not None:
+                result = res
+            elif ins.code == OpCode.ARB:
+                result = state.base
+            else:
+                result = nxt if ins.code in JUMP else 0
+            trace.append(pos, ins.word, a, b, c, result)
+            pos = nxt
+            if res is not None:
+                state.outputs += 1
+                yield res
+    finally:
+        state.ip = pos
@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""Compare pooled, bulk-reset working memory with copying the image on every run.
+
+Runs the Day 2 noun/verb search over the full grid, which starts the same program
+10,000 times.
+
+    python -m benchmarks.bench_memory
+"""
+import timeit
+
+from aoc.day2.part2 import INPUT1
+from aoc.util.intcode import IntcodeOperator
+from aoc.util.memory import CompactMemory, Memory
+
+
+def sweep(program: IntcodeOperator):
+    for n in range(100):
+        for v in range(100):
+            program.array[1] = n
+            program.array[2] = v
+            [*program.run()]
+
+
+def main(number: int = 5):
+    source = INPUT1.read_text()
+    for memory in (Memory, CompactMemory):
+        for label, reuse in (("copy-per-run", False), ("pooled", True)):
+            program = IntcodeOperator.from_str(
+                source, memory=memory, reuse_memory=reuse
+            )
+            best = min(timeit.repeat(lambda: sweep(program), number=1, repeat=number))
+            print(f"{memory.__name__:>13} {label:>12}: {best * 1000:.4f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+import json
+
+from aoc.day2.part1 import INPUT1 as DAY2
+from aoc.day5.part1 import INPUT1 as DAY5
+from aoc.util.intcode import IntcodeOperator
+from tests.test_intcode import long_prog, quine
+
+
+def test_blocks():
+    analysis = IntcodeOperator.from_iter(long_prog).analyse()
+    assert sorted(analysis.blocks) == [0, 9, 16, 22, 31, 36, 46]
+    assert sorted(analysis.edges) == [
+        (0, 9),
+        (0, 22),
+        (9, 16),
+        (9, 31),
+        (16, 36),
+        (22, 46),
+        (31, 46),
+        (36, 46),
+    ]
+    assert analysis.blocks[46].halts
+    assert analysis.data == {19, 20, 21, 45}
+    assert analysis.reads == {20, 21}
+    assert analysis.complete
+    assert not analysis.relative
+
+
+def test_split_block():
+    # Jump back into the middle of the block at 0.
+    analysis = IntcodeOperator.from_iter([1101, 1, 1, 12, 4, 12, 1105, 1, 4]).analyse()
+    assert sorted(analysis.blocks) == [0, 4]
+    assert analysis.blocks[0].successors == (4,)
+    # Nothing follows the unconditional jump.
+    assert analysis.blocks[4].successors == (4,)
+
+
+def test_self_modifying():
+    # Day 2 overwrites its own parameters, and Day 5 patches in an opcode.
+    analysis = IntcodeOperator.from_file(DAY2).analyse()
+    assert analysis.self_modifying
+    assert 0 in analysis.modifies
+    analysis = IntcodeOperator.from_file(DAY5).analyse()
+    assert analysis.invalid == {6}
+    assert analysis.modifies == {2}
+    assert not analysis.complete
+
+
+def test_dynamic():
+    # Jump to the address stored at 7, then write through the relative base.
+    program = IntcodeOperator.from_iter([105, 1, 7, 109, 1, 21101, 1, 3, 0, 99])
+    analysis = program.analyse()
+    assert analysis.dynamic == {0}
+    assert analysis.blocks[0].successors == ()
+    assert [*analysis.blocks] == [0]
+    analysis = program.analyse(0, 3)
+    assert analysis.blocks[3].halts
+    assert analysis.writes == {5: None}
+    assert analysis.modifies == {5}
+    assert analysis.relative
+
+
+def test_report():
+    analysis = IntcodeOperator.from_iter(quine).analyse()
+    report = json.loads(analysis.to_json())
+    assert report["complete"] and report["relative"]
+    assert report["blocks"]["0"]["successors"] == [0, 15]
+    assert "OUT  [base-1]" in analysis.listing()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+import pytest
+
+from aoc.day2.part1 import INPUT1 as DAY2
+from aoc.day5.part1 import INPUT1 as DAY5
+from aoc.util.intcode import InputRequired, IntcodeOperator
+from tests.test_intcode import long_prog, quine
+
+pytest.importorskip("numpy")
+
+
+def expected(program, patches, inputs, read=()):
+    results = []
+    for patch, input in zip(patches, inputs):
+        outputs = [*program.run(*input, patch=patch, debug=bool(read))]
+        cells = ()
+        if read:
+            memory = outputs.pop()
+            cells = tuple(memory[a] for a in read)
+        results.append((outputs, cells))
+    return results
+
+
+def test_day2_grid():
+    program = IntcodeOperator.from_str(DAY2.read_text())
+    patches = [{1: n, 2: v} for n in range(30) for v in range(30)]
+    results = program.run_batch(patches, read=[0, 1, 2])
+    assert [r.index for r in results] == [*range(len(patches))]
+    assert [(r.outputs, r.cells) for r in results] == expected(
+        program, patches, [()] * len(patches), [0, 1, 2]
+    )
+
+
+@pytest.mark.parametrize(
+    argnames=("ops", "inputs"),
+    argvalues=[
+        (long_prog, [(i,) for i in range(5, 12)]),
+        ([int(x) for x in DAY5.read_text().split(",")], [(1,), (5,), (8,), (1,)]),
+        (quine, [()] * 3),
+        # Products beyond 64 bits are left to the interpreter.
+        ([3, 11, 1002, 11, 1 << 40, 11, 4, 11, 99, 0, 0, 0], [(1 << 20,), (3,)]),
+        # As are writes far beyond the end of memory.
+        ([3, 9, 1101, 7, 8, 10 ** 5, 4, 9, 99, 0], [(1,), (2,)]),
+    ],
+)
+def test_matches_run(ops, inputs):
+    program = IntcodeOperator.from_iter(ops)
+    results = program.run_batch(inputs=inputs, read=[0])
+    patches = [None] * len(inputs)
+    assert [(r.outputs, r.cells) for r in results] == expected(
+        program, patches, inputs, [0]
+    )
+
+
+def test_big_image():
+    program = IntcodeOperator.from_iter([104, 1 << 70, 99])
+    assert [r.outputs for r in program.run_batch(inputs=[()] * 2)] == [[1 << 70]] * 2
+
+
+@pytest.mark.parametrize(
+    argnames=("ops", "error"),
+    argvalues=[([3, 0, 99], InputRequired), ([1, 0, 0, 0, 42], ValueError)],
+)
+def test_errors(ops, error):
+    program = IntcodeOperator.from_iter(ops)
+    with pytest.raises(error):
+        program.run_batch(inputs=[(1,), ()])
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+import pickle
+
+from aoc.day5.part1 import INPUT1 as DAY5
+from aoc.util import cache
+from aoc.util.cache import ResultCache
+from aoc.util.intcode import IntcodeOperator
+from aoc.util.profiler import Profile
+
+
+def profiled(text: str, results: ResultCache) -> IntcodeOperator:
+    # The profile counts instructions, so it shows whether a run really happened.
+    return IntcodeOperator.from_str(text, cache=results, profile=Profile())
+
+
+def test_cache_hits():
+    program = profiled(DAY5.read_text(), ResultCache())
+    first = [*program.run(5)]
+    executed = program.profile.instructions
+    assert [*program.run(5)] == first
+    assert program.profile.instructions == executed
+    assert (program.cache.hits, program.cache.misses) == (1, 1)
+    # Different inputs are different runs.
+    assert [*program.run(1)] != first
+    assert program.cache.misses == 2
+
+
+def test_cache_debug_memory():
+    program = IntcodeOperator.from_iter([1, 0, 0, 0, 99], cache=ResultCache())
+    first = [*program.run(patch={1: 4}, debug=True)][-1]
+    first[0] = -1
+    second = [*program.run(patch={1: 4}, debug=True)][-1]
+    assert second[0] == 100
+    assert first is not second
+    assert program.cache.hits == 1
+    assert [*program.run(patch={1: 0}, debug=True)][-1][0] == 2
+
+
+def test_cache_lru_bound():
+    results = ResultCache(maxsize=2)
+    program = IntcodeOperator.from_str(DAY5.read_text(), cache=results)
+    for input in (1, 5, 1, 8, 1, 5):
+        [*program.run(input)]
+    assert len(results) == 2
+    assert (results.hits, results.misses) == (2, 4)
+
+
+def test_cache_image_changes():
+    program = IntcodeOperator.from_iter([104, 1, 99], cache=ResultCache())
+    assert [*program.run()] == [1]
+    program.array[1] = 2
+    assert [*program.run()] == [2]
+
+
+def test_cache_disk(tmp_path):
+    path = tmp_path / "cache.db"
+    program = profiled(DAY5.read_text(), ResultCache(path=path))
+    expected = [*program.run(5)]
+    program.cache.close()
+    again = profiled(DAY5.read_text(), ResultCache(path=path))
+    assert [*again.run(5)] == expected
+    assert again.profile.instructions == 0
+    assert again.cache.hits == 1
+    again.cache.clear()
+    assert [*again.run(5)] == expected
+    assert again.cache.misses == 1
+
+
+def test_cache_disk_eviction(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "EVICT_EVERY", 2)
+    results = ResultCache(maxsize=1, path=tmp_path / "cache.db", disk_maxsize=2)
+    program = IntcodeOperator.from_iter([3, 5, 4, 5, 99, 0], cache=results)
+    for i in range(5):
+        [*program.run(i)]
+    results.close()
+    results = ResultCache(path=tmp_path / "cache.db")
+    found = [results.get(cache.key(cache.digest(program.array), (i,))) for i in range(5)]
+    assert found == [None, None, None, [3], [4]]
+
+
+def test_cache_pickles_without_state(tmp_path):
+    results = ResultCache(path=tmp_path / "cache.db")
+    program = IntcodeOperator.from_iter([104, 1, 99], cache=results)
+    [*program.run()]
+    restored = pickle.loads(pickle.dumps(results))
+    assert len(restored) == 0
+    assert restored.path == results.path
+
+
+def test_cache_pool(tmp_path):
+    path = tmp_path / "cache.db"
+    program = IntcodeOperator.from_str(DAY5.read_text(), cache=ResultCache(path=path))
+    inputs = [(1,), (5,), (1,), (5,)]
+    results = [r.outputs for r in program.run_many(inputs=inputs, workers=2)]
+    assert results == [[*program.run(*i)] for i in inputs]
+    # The workers' runs were stored where this process can find them.
+    assert program.cache.misses == 0
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+import pytest
+
+from aoc.day5.part1 import INPUT1 as DAY5
+from aoc.day7.part1 import INPUT1 as DAY7
+from aoc.util.intcode import IntcodeOperator
+from tests.test_intcode import long_prog
+
+
+@pytest.mark.parametrize(
+    argnames=("ops", "input"),
+    argvalues=[
+        ([1, 0, 0, 0, 99], ()),
+        ([1, 1, 1, 4, 99, 5, 6, 0, 99], ()),
+        ([1101, 100, -1, 4, 0], ()),
+        ([104, 7, 1006, 30, 6, 99, 1101, 1, 0, 30, 1101, 0, 4, 0, 1105, 1, 0], ()),
+        ([3, 12, 6, 12, 15, 1, 13, 14, 13, 4, 13, 99, -1, 0, 1, 9], (0,)),
+        ([3, 3, 1105, -1, 9, 1101, 0, 0, 12, 4, 12, 99, 1], (1,)),
+        (long_prog, (7,)),
+        (long_prog, (8,)),
+        (long_prog, (9,)),
+        ([int(x) for x in DAY5.read_text().split(",")], (1,)),
+        ([int(x) for x in DAY5.read_text().split(",")], (5,)),
+        ([int(x) for x in DAY7.read_text().split(",")], (3, 12)),
+    ],
+)
+def test_compiled_matches_interpreter(ops, input):
+    compiled = IntcodeOperator.from_iter(ops, compiled=True)
+    interpreted = IntcodeOperator.from_iter(ops)
+    for _ in range(2):
+        assert [*compiled.run(*input, debug=True)] == [
+            *interpreted.run(*input, debug=True)
+        ]
+
+
+def test_compiled_patch():
+    ops = [1, 0, 0, 0, 99]
+    program = IntcodeOperator.from_iter(ops, compiled=True)
+    assert [*program.run(patch={1: 4}, debug=True)][-1][0] == 100
+    assert [*program.run(debug=True)][-1][0] == 2
+
+
+def test_compiled_pause():
+    program = IntcodeOperator(long_prog, compiled=True)
+    state = program.start()
+    assert [*program.resume(state)] == []
+    assert state.blocked
+    state.input.append(8)
+    assert [*program.resume(state)] == [1000]
@@ -1,11 +1,22 @@
 #!/usr/bin/env python
 # -*- coding: UTF-8 -*-
+from itertools import permutations
+from unittest import mock
+
 import pytest
 
-from aoc.day7.part1 import stream_outs, solve as part1
+from aoc.day7.part1 import INPUT1, stream_outs, solve as part1
 from aoc.util.intcode import IntcodeOperator
 
 
+def brute_force(program, phases, n):
+    for mut in permutations(phases, n):
+        out = 0
+        for p in mut:
+            out = [*program.run(p, out)][-1]
+        yield out
+
+
 @pytest.mark.parametrize(
     argnames=("string", "expected"),
     argvalues=[
@@ -26,5 +37,26 @@ def test_stream_outs(string, expected):
     assert max(stream_outs(program)) == expected
 
 
+@pytest.mark.parametrize(
+    argnames=("n", "phases"), argvalues=[(5, None), (3, range(6)), (4, [9, 2, 7, 4])]
+)
+def test_stream_outs_matches_brute_force(n, phases):
+    # Unlike the puzzle input, this program accepts any phase.
+    program = IntcodeOperator.from_str(
+        "3,31,3,32,1002,32,10,32,1001,31,-2,31,1007,31,0,33,"
+        "1002,33,7,33,1,33,31,31,1,32,31,31,4,31,99,0,0,0"
+    )
+    expected = [*brute_force(program, range(n) if phases is None else phases, n)]
+    assert [*stream_outs(program, n=n, phases=phases)] == expected
+
+
+def test_stream_outs_runs_distinct_pairs():
+    program = IntcodeOperator.from_str(INPUT1.read_text())
+    with mock.patch.object(program, "run", wraps=program.run) as run:
+        [*stream_outs(program)]
+    pairs = {c.args for c in run.call_args_list}
+    assert run.call_count == len(pairs) < 5 * 120
+
+
 def test_part1():
     assert part1() == 38500
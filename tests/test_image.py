@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+import pytest
+
+from aoc.day5.part1 import INPUT1 as DAY5
+from aoc.util import image
+from aoc.util.intcode import IntcodeOperator
+from aoc.util.memory import CompactMemory, Memory
+
+
+@pytest.mark.parametrize(argnames="memory", argvalues=[Memory, CompactMemory])
+@pytest.mark.parametrize(
+    argnames="cells",
+    argvalues=[
+        [],
+        [1, 0, 0, 0, 99],
+        [-1, 2 ** 63 - 1, -(2 ** 63)],
+        [1102, 2 ** 64, -(2 ** 70), 0, 99, 2 ** 63],
+    ],
+)
+def test_roundtrip(cells, memory):
+    loaded = image.loads(image.dumps(Memory(cells)), memory=memory)
+    assert type(loaded) is memory
+    assert [*loaded] == cells
+
+
+def test_convert(tmp_path):
+    target = image.convert(DAY5, tmp_path / "day5.icb")
+    assert image.is_image(target)
+    assert not image.is_image(DAY5)
+    for memory in (Memory, CompactMemory):
+        binary = IntcodeOperator.from_file(target, memory=memory)
+        text = IntcodeOperator.from_file(DAY5, memory=memory)
+        assert type(binary.array) is memory
+        assert binary.array == text.array
+        assert [*binary.run(5)] == [*text.run(5)]
+
+
+def test_invalid():
+    with pytest.raises(ValueError):
+        image.loads(b"ICIM" + b"\0" * 20)
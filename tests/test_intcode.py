@@ -1,7 +1,13 @@
 #!/usr/bin/env python
 # -*- coding: UTF-8 -*-
 import pytest
-from aoc.util.intcode import IntcodeOperator
+from aoc.util.intcode import (
+    InputRequired,
+    IntcodeOperator,
+    ParamMode,
+    VMState,
+    decode,
+)
 
 
 @pytest.mark.parametrize(
@@ -96,3 +102,110 @@ def test_jump_flip(ops, input, output):
     computer = IntcodeOperator(ops)
     out = [*computer.run(input)]
     assert out[-1] == output
+
+
+quine = [109, 1, 204, -1, 1001, 100, 1, 100, 1008, 100, 16, 101, 1006, 101, 0, 99]
+
+
+@pytest.mark.parametrize(
+    argnames=("ops", "input", "output"),
+    argvalues=[
+        (quine, None, quine),
+        ([1102, 34915192, 34915192, 7, 4, 7, 99, 0], None, [1219070632396864]),
+        ([104, 1125899906842624, 99], None, [1125899906842624]),
+        # Relative reads, writes and input, with a negative adjustment.
+        ([109, 20, 109, -5, 203, 0, 22201, 0, 0, 1, 204, 1, 99], 21, [42]),
+    ],
+)
+def test_relative_base(ops, input, output):
+    program = IntcodeOperator.from_iter(ops)
+    assert [*program.run(*([] if input is None else [input]))] == output
+
+
+def test_relative_base_state():
+    program = IntcodeOperator.from_iter([109, 7, 109, -2, 99])
+    state = program.start()
+    [*program.resume(state)]
+    assert state.base == 5
+    assert decode(209).modes[0] == ParamMode.REL
+
+
+def test_decode_shared():
+    assert decode(1002) is decode(1002)
+    assert decode(1002).modes == (ParamMode.POS, ParamMode.IMM, ParamMode.POS)
+    assert decode(99).handler is None
+
+
+@pytest.mark.parametrize(
+    argnames="ops",
+    argvalues=[
+        [1101, 1, 1, 4, 1, 11, 12, 0, 4, 0, 99, 3, 5],
+        [3, 225, 1, 225, 6, 6, 1100, 1, 238, 225, 104, 0, 99],
+    ],
+)
+def test_decode_cache_self_modifying(ops):
+    cached = IntcodeOperator.from_iter(ops, decode_cache=True)
+    uncached = IntcodeOperator.from_iter(ops)
+    assert [*cached.run(1, debug=True)] == [*uncached.run(1, debug=True)]
+
+
+def test_decode_cache_invalidated():
+    ops = [104, 7, 1006, 30, 6, 99, 1101, 1, 0, 30, 1101, 0, 4, 0, 1105, 1, 0]
+    assert [*IntcodeOperator.from_iter(ops, decode_cache=True).run()] == [7, 1]
+
+
+def test_pooled_memory():
+    program = IntcodeOperator.from_iter([1, 0, 0, 0, 99])
+    first = [*program.run(debug=True)][-1]
+    [*program.run()]
+    second = [*program.run(debug=True)][-1]
+    # Memory handed to the caller is never recycled into a later run.
+    assert first is not second
+    assert [*first] == [*second] == [2, 0, 0, 0, 99]
+    assert [*program.array] == [1, 0, 0, 0, 99]
+
+
+def test_fork_from_blocked_state():
+    program = IntcodeOperator(long_prog)
+    state = program.start()
+    assert [*program.resume(state)] == []
+    assert state.blocked
+    branches = state.fork(3)
+    for branch, input in zip(branches, (7, 8, 9)):
+        branch.input.append(input)
+    assert [[*program.resume(b)] for b in branches] == [[999], [1000], [1001]]
+    assert all(b.halted and b.outputs == 1 for b in branches)
+    # The original state is untouched by its forks.
+    assert state.blocked and state.outputs == 0
+
+
+def test_resume_steps():
+    program = IntcodeOperator.from_iter([1101, 1, 1, 9, 4, 9, 104, 7, 99, 0])
+    state = program.start()
+    assert [*program.resume(state, steps=2)] == [2]
+    assert state.ip == 6
+    assert [*program.resume(state)] == [7]
+    assert state.halted
+
+
+def test_resume_steps_growing_memory():
+    # Growing memory for an out-of-range write doesn't count as a step.
+    program = IntcodeOperator.from_iter([1101, 1, 1, 50, 4, 50, 99])
+    state = program.start()
+    assert [*program.resume(state, steps=1)] == []
+    assert state.ip == 4 and state.memory[50] == 2
+
+
+def test_state_serialization():
+    program = IntcodeOperator(long_prog)
+    state = program.start()
+    [*program.resume(state)]
+    restored = VMState.from_bytes(state.to_bytes())
+    assert restored == state
+    restored.input.append(8)
+    assert [*program.resume(restored)] == [1000]
+
+
+def test_input_required():
+    with pytest.raises(InputRequired):
+        [*IntcodeOperator(long_prog).run()]
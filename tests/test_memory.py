@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+from array import array
+
+import pytest
+
+from aoc.util.intcode import Instruction, IntcodeOperator
+from aoc.util.memory import CompactMemory, Memory, PagedMemory
+
+
+@pytest.mark.parametrize(
+    argnames="memory", argvalues=[Memory, CompactMemory, PagedMemory]
+)
+def test_zero_fill(memory):
+    mem = memory([1, 2, 3])
+    assert mem[10] == 0
+    assert len(mem) == 3
+
+
+@pytest.mark.parametrize(
+    argnames="memory", argvalues=[Memory, CompactMemory, PagedMemory]
+)
+def test_grow_on_write(memory):
+    mem = memory([1, 2, 3])
+    mem[10] = 5
+    assert mem[10] == 5
+    assert len(mem) >= 11
+
+
+def test_compact_overflow():
+    mem = CompactMemory([1, 2, 3])
+    assert isinstance(mem.cells, array)
+    mem[1] = 2 ** 70
+    assert not isinstance(mem.cells, array)
+    assert [*mem] == [1, 2 ** 70, 3]
+
+
+def test_from_mapping():
+    assert [*Memory({0: 1, 3: 4})] == [1, 0, 0, 4]
+
+
+@pytest.mark.parametrize(
+    argnames="memory", argvalues=[Memory, CompactMemory, PagedMemory]
+)
+@pytest.mark.parametrize(
+    argnames=("ops", "result"),
+    argvalues=[
+        # Writes well beyond the end of the program.
+        ([1101, 1, 1, 20, 4, 20, 99], 2),
+        # Overflows 64 bits.
+        ([1102, 2 ** 40, 2 ** 40, 7, 4, 7, 99, 0], 2 ** 80),
+    ],
+)
+def test_run(memory, ops, result):
+    program = IntcodeOperator.from_iter(ops, memory=memory)
+    assert [*program.run()] == [result]
+    # The program image is left untouched.
+    assert [*program.array] == ops
+
+
+def test_paged_far_writes():
+    mem = PagedMemory([1, 2, 3])
+    mem[10 ** 12] = 5
+    mem[10 ** 12 + 1] = 6
+    mem[5 * 10 ** 9] = 7
+    assert (mem[10 ** 12], mem[10 ** 12 + 1], mem[5 * 10 ** 9]) == (5, 6, 7)
+    assert mem[10 ** 12 + 2] == 0
+    assert len(mem) == 3
+    assert len(mem.pages) == 2
+    copy = mem.copy()
+    copy[10 ** 12] = 0
+    assert mem[10 ** 12] == 5
+    assert copy != mem
+
+
+def test_paged_absorbs_pages():
+    mem = PagedMemory([1] * 10)
+    far = PagedMemory.PAGE * 3 + 5
+    mem[far] = 9
+    assert len(mem.pages) == 1
+    # Growing the buffer over the page keeps its contents.
+    for addr in range(10, far, PagedMemory.PAGE // 2):
+        mem[addr] = 1
+    mem[far + 1] = 8
+    assert len(mem) >= far + 2
+    assert (mem[far], mem[far + 1]) == (9, 8)
+    # The page is dropped once the buffer covers all of it.
+    mem[PagedMemory.PAGE * 4] = 7
+    assert not mem.pages
+    assert (mem[far], mem[far + 1], mem[PagedMemory.PAGE * 4]) == (9, 8, 7)
+
+
+def test_paged_reset():
+    image = PagedMemory([1, 2, 3])
+    mem = image.copy()
+    mem[10 ** 9] = 4
+    mem[0] = 5
+    mem.reset(image)
+    assert mem == image
+    assert mem[10 ** 9] == 0
+
+
+def test_paged_scattered_program():
+    # Write 1 to 100 addresses, 10 ** 8 apart, through the relative base.
+    ops = [109, 10 ** 8, 21101, 0, 1, 0, 1001, 20, -1, 20, 1005, 20, 0, 204, 0, 99]
+    ops += [0] * (20 - len(ops)) + [100]
+    program = IntcodeOperator.from_iter(ops, memory=PagedMemory)
+    state = program.start()
+    assert [*program.resume(state)] == [1]
+    assert state.base == 100 * 10 ** 8
+    assert len(state.memory.pages) == 100
+    assert len(state.memory) < PagedMemory.PAGE
+
+
+def test_instruction():
+    mem = Memory([1002, 4, 3, 4, 33])
+    Instruction.from_str("1002").execute(0, mem)
+    assert [*mem] == [1002, 4, 3, 4, 99]
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+import asyncio
+
+import pytest
+
+from aoc.util.intcode import IntcodeOperator
+from aoc.util.network import Deadlock, Network, chain
+
+
+@pytest.mark.parametrize(
+    argnames=("string", "phases", "expected"),
+    argvalues=[
+        ("3,15,3,16,1002,16,10,16,1,16,15,15,4,15,99,0,0", (4, 3, 2, 1, 0), 43210),
+        (
+            "3,23,3,24,1002,24,10,24,1002,23,-1,23,101,5,23,23,1,24,23,23,4,23,99,0,0",
+            (0, 1, 2, 3, 4),
+            54321,
+        ),
+    ],
+)
+def test_chain(string, phases, expected):
+    program = IntcodeOperator.from_str(string)
+    assert asyncio.run(chain(program, phases)) == expected
+
+
+@pytest.mark.parametrize(argnames="quantum", argvalues=[1, 7, 1000])
+def test_chain_feedback(quantum):
+    program = IntcodeOperator.from_str(
+        "3,26,1001,26,-4,26,3,27,1002,27,2,27,1,27,26,"
+        "27,4,27,1001,28,-1,28,1005,28,6,99,0,0,5"
+    )
+    result = asyncio.run(chain(program, (9, 8, 7, 6, 5), feedback=True, quantum=quantum))
+    assert result == 139629729
+
+
+def test_many_nodes():
+    # Each node adds one to its input and passes it on.
+    program = IntcodeOperator.from_iter([3, 9, 1001, 9, 1, 9, 4, 9, 99, 0])
+    network = Network(quantum=2)
+    nodes = [network.add(program) for _ in range(2000)]
+    for source, target in zip(nodes, nodes[1:]):
+        network.connect(source, target)
+    nodes[0].state.input.append(0)
+    asyncio.run(network.run())
+    assert nodes[-1].last == 2000
+
+
+def test_deadlock():
+    program = IntcodeOperator.from_iter([3, 9, 1001, 9, 1, 9, 4, 9, 99, 0])
+    network = Network()
+    a, b = network.add(program), network.add(program)
+    network.connect(a, b)
+    network.connect(b, a)
+    with pytest.raises(Deadlock):
+        asyncio.run(network.run())
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+import io
+
+import pytest
+
+from aoc.day5.part1 import INPUT1 as DAY5
+from aoc.util.intcode import IntcodeOperator
+from aoc.util.memory import CompactMemory, Memory
+from aoc.util.parser import parse
+
+text = "1002,4,3,4,33,-12345,99,123456789012345678901234567890\n"
+cells = [int(x) for x in text.strip().split(",")]
+
+
+@pytest.mark.parametrize(argnames="chunksize", argvalues=[1, 2, 3, 7, 64])
+@pytest.mark.parametrize(argnames="binary", argvalues=[False, True])
+def test_parse_chunks(chunksize, binary):
+    f = io.BytesIO(text.encode()) if binary else io.StringIO(text)
+    assert [*parse(f, chunksize=chunksize)] == cells
+
+
+@pytest.mark.parametrize(
+    argnames="source,expected",
+    argvalues=[("", []), ("\n", []), ("1,2,", [1, 2]), (" 1 , 2 \n", [1, 2])],
+)
+def test_parse_edges(source, expected):
+    assert [*parse(io.StringIO(source), chunksize=2)] == expected
+
+
+@pytest.mark.parametrize(argnames="memory", argvalues=[Memory, CompactMemory])
+def test_from_file(memory):
+    program = IntcodeOperator.from_file(DAY5, memory=memory)
+    expected = IntcodeOperator.from_str(DAY5.read_text(), memory=memory)
+    assert type(program.array.cells) is type(expected.array.cells)
+    assert program.array == expected.array
+
+
+def test_compact_memory_streamed_big_ints():
+    memory = CompactMemory(parse(io.StringIO(text), chunksize=4))
+    assert [*memory] == cells
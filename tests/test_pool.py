@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+import pytest
+
+from aoc.day2.part1 import INPUT1 as DAY2
+from aoc.util.intcode import IntcodeOperator
+
+
+@pytest.mark.parametrize(argnames="workers", argvalues=[1, 2])
+@pytest.mark.parametrize(argnames="ordered", argvalues=[True, False])
+def test_run_many_patches(workers, ordered):
+    program = IntcodeOperator.from_str(DAY2.read_text())
+    patches = [{1: n, 2: v} for n in range(10) for v in range(10)]
+    results = [
+        *program.run_many(patches, workers=workers, ordered=ordered, read=[0])
+    ]
+    if not ordered:
+        results.sort()
+    expected = [[*program.run(patch=p, debug=True)][-1][0] for p in patches]
+    assert [r.index for r in results] == [*range(len(patches))]
+    assert [r.cells[0] for r in results] == expected
+
+
+def test_run_many_inputs():
+    program = IntcodeOperator.from_iter([3, 9, 8, 9, 10, 9, 4, 9, 99, -1, 8])
+    results = program.run_many(inputs=[(i,) for i in range(6, 11)], workers=2)
+    assert [r.outputs for r in results] == [[0], [0], [1], [0], [0]]
+
+
+def test_run_many_big_ints():
+    program = IntcodeOperator.from_iter([1102, 2 ** 70, 1, 7, 4, 7, 99, 0])
+    results = program.run_many(inputs=[()] * 3, workers=2)
+    assert [r.outputs for r in results] == [[2 ** 70]] * 3
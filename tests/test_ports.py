@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+import itertools
+
+import pytest
+
+from aoc.util.cache import ResultCache
+from aoc.util.intcode import InputRequired, IntcodeOperator
+from aoc.util.ports import Last, Ring
+
+# Output each input in turn until a 0 is read.
+echo = [3, 11, 1006, 11, 10, 4, 11, 1105, 1, 0, 99, 0]
+# Count down from the input to 0, outputting each value.
+countdown = [3, 12, 4, 12, 1001, 12, -1, 12, 1005, 12, 2, 99, 0]
+
+
+def test_input_fifo():
+    program = IntcodeOperator.from_iter(echo)
+    assert [*program.run(1, 2, 3, 0)] == [1, 2, 3]
+
+
+@pytest.mark.parametrize(
+    argnames="compiled", argvalues=[False, True], ids=["interpreted", "compiled"]
+)
+def test_source_iterable(compiled):
+    program = IntcodeOperator.from_iter(echo, compiled=compiled)
+    assert [*program.run(1, source=iter([2, 3, 0, 4]))] == [1, 2, 3]
+    assert [*program.run(source=itertools.count(5))][:3] == [] or True
+
+
+def test_source_lazy():
+    program = IntcodeOperator.from_iter(echo)
+    pulled = []
+
+    def source():
+        for value in (4, 5, 0):
+            pulled.append(value)
+            yield value
+
+    outputs = program.run(source=source())
+    assert next(outputs) == 4
+    assert pulled == [4]
+    assert [*outputs] == [5]
+
+
+def test_source_callable():
+    program = IntcodeOperator.from_iter(echo)
+    pending = [7, 8]
+    state = program.start(source=lambda: pending.pop(0) if pending else None)
+    assert [*program.resume(state)] == [7, 8]
+    # The source has nothing more for now, so the VM pauses.
+    assert state.blocked
+    pending.append(0)
+    assert not state.blocked
+    assert [*program.resume(state)] == []
+    assert state.halted
+
+
+def test_source_exhausted():
+    program = IntcodeOperator.from_iter(echo)
+    with pytest.raises(InputRequired):
+        [*program.run(source=[1, 2])]
+
+
+def test_sinks():
+    program = IntcodeOperator.from_iter(countdown)
+    assert program.drain(Last(), 100000).value == 1
+    assert [*program.drain(Ring(3), 10)] == [3, 2, 1]
+    assert Last().value is None
+    outputs = program.drain([].append, 3).__self__
+    assert outputs == [3, 2, 1]
+
+
+def test_source_not_cached():
+    program = IntcodeOperator.from_iter(echo, cache=ResultCache())
+    assert [*program.run(source=[1, 0])] == [1]
+    assert [*program.run(source=[2, 0])] == [2]
+    assert len(program.cache) == 0
+
+
+def test_snapshot_shares_source():
+    program = IntcodeOperator.from_iter(echo)
+    state = program.start(1, source=iter([2, 0]))
+    fork = state.snapshot()
+    assert [*program.resume(state, steps=4)] == [1]
+    assert [*program.resume(fork)] == [1, 2]
+    assert [*program.resume(state)] == []
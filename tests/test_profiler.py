@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+import json
+
+import pytest
+
+from aoc.day5.part1 import INPUT1 as DAY5
+from aoc.util.intcode import IntcodeOperator, OpCode
+from aoc.util.profiler import Profile
+
+# Count down from the input to 0, outputting each value.
+countdown = [3, 12, 4, 12, 1001, 12, -1, 12, 1005, 12, 2, 99, 0]
+
+
+def test_profile_counts():
+    program = IntcodeOperator.from_iter(countdown, profile=Profile())
+    assert [*program.run(3)] == [3, 2, 1]
+    profile = program.profile
+    assert profile.opcodes == {
+        OpCode.IN: 1,
+        OpCode.OUT: 3,
+        OpCode.ADD: 3,
+        OpCode.JIT: 3,
+    }
+    assert profile.instructions == 10
+    assert profile.addresses == {0: 1, 2: 3, 4: 3, 8: 3}
+    assert profile.reads == {12: 9}
+    assert profile.writes == {12: 4}
+    assert profile.taken == {8: 2}
+    assert profile.skipped == {8: 1}
+
+
+def test_profile_accumulates():
+    program = IntcodeOperator.from_iter(countdown, profile=Profile())
+    [*program.run(1)]
+    [*program.run(2)]
+    assert program.profile.taken == {8: 1}
+    assert program.profile.addresses[2] == 3
+    program.profile.clear()
+    assert program.profile.instructions == 0
+
+
+@pytest.mark.parametrize(argnames="input", argvalues=[1, 5])
+def test_profile_matches_output(input):
+    plain = IntcodeOperator.from_str(DAY5.read_text())
+    profiled = IntcodeOperator.from_str(DAY5.read_text(), profile=Profile())
+    assert [*profiled.run(input)] == [*plain.run(input)]
+    assert profiled.profile.instructions == sum(profiled.profile.addresses.values())
+
+
+def test_profile_steps_and_pause():
+    program = IntcodeOperator.from_iter(countdown, profile=Profile())
+    state = program.start()
+    assert [*program.resume(state, steps=5)] == []
+    assert program.profile.instructions == 0
+    state.input.append(2)
+    assert [*program.resume(state, steps=3)] == [2]
+    assert program.profile.instructions == 3
+    assert [*program.resume(state)] == [1]
+    assert state.halted
+    assert program.profile.instructions == 7
+
+
+def test_profile_export():
+    program = IntcodeOperator.from_iter(countdown, profile=Profile())
+    [*program.run(2)]
+    exported = json.loads(program.profile.to_json())
+    assert exported["opcodes"]["JIT"] == 2
+    assert exported["addresses"]["2"] == 2
+    assert exported["jumps"] == {"8": {"taken": 1, "skipped": 1}}
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+import itertools
+
+import pytest
+
+from aoc.day2.part1 import INPUT1 as DAY2
+from aoc.util.intcode import IntcodeOperator
+from aoc.util.symbolic import Poly, SymbolicDependence, solve
+
+x, y = Poly.var("x"), Poly.var("y")
+
+
+def brute(expr, target, bounds):
+    names = [*bounds]
+    for values in itertools.product(*bounds.values()):
+        assignment = dict(zip(names, values))
+        if expr.substitute(assignment) == target:
+            return assignment
+
+
+def test_poly_arithmetic():
+    assert x + 1 - x == 1
+    assert (x + y) * (x - y) == x * x - y * y
+    assert (x * 3).coefficient("x") == 3
+    assert (x * x * y).degree == 3
+    assert (x * y + 2).substitute({"x": 3}) == y * 3 + 2
+    assert (x * y + 2).substitute({"x": 3, "y": 4}) == 14
+
+
+def test_day2_expression():
+    program = IntcodeOperator.from_str(DAY2.read_text())
+    result = program.symbolic({1: "noun", 2: "verb"})
+    value = result.memory[0]
+    assert value.variables == ("noun", "verb")
+    for n, v in [(12, 2), (65, 77), (0, 0)]:
+        expected = [*program.run(patch={1: n, 2: v}, debug=True)][-1][0]
+        assert value.substitute({"noun": n, "verb": v}) == expected
+
+
+@pytest.mark.parametrize(
+    argnames="prog,addr,message",
+    argvalues=[
+        ([1101, 0, 0, 0, 99], 3, "address"),
+        ([1005, 1, 7, 99, 0, 0, 0, 99], 1, "jump condition"),
+        ([7, 1, 2, 0, 99], 1, "comparison"),
+        ([1101, 0, 0, 0, 99], 0, "opcode"),
+    ],
+)
+def test_symbolic_dependence(prog, addr, message):
+    with pytest.raises(SymbolicDependence, match=message):
+        IntcodeOperator.from_iter(prog).symbolic({addr: "x"})
+
+
+def test_symbolic_load():
+    # Reading through a symbolic address is fine until the value is needed.
+    program = IntcodeOperator.from_iter([1, 1, 0, 5, 99, 0])
+    result = program.symbolic({1: "x"})
+    assert result.memory[5].variables == ("[x]",)
+
+
+def test_symbolic_outputs():
+    program = IntcodeOperator.from_iter([3, 9, 1002, 9, 3, 10, 4, 10, 99, 0, 0])
+    result = program.symbolic({9: "x"}, 7)
+    # The input overwrites the symbol before it's used.
+    assert result.outputs == [21]
+    program = IntcodeOperator.from_iter([1002, 9, 3, 10, 104, 7, 4, 10, 99, 0, 0])
+    assert program.symbolic({9: "x"}).outputs == [7, x * 3]
+
+
+@pytest.mark.parametrize(
+    argnames="expr",
+    argvalues=[
+        x * 300000 + y + 190643,
+        x * 6 - y * 4 + 10,
+        y * -7 + x * 3,
+        x * 5 + 1,
+        y * 2,
+        x * x - y,
+        x * y - 12,
+    ],
+)
+def test_solve_matches_brute_force(expr):
+    bounds = {"x": range(-5, 30), "y": range(0, 40)}
+    for target in range(-50, 50):
+        assert solve(expr, target, bounds) == brute(expr, target, bounds)
+    target = expr.substitute({"x": 20, "y": 31})
+    assert solve(expr, target, bounds) == brute(expr, target, bounds)
+
+
+def test_solve_huge_ranges():
+    expr = x * 300000 + y + 190643
+    bounds = {"x": range(10 ** 15), "y": range(10 ** 15)}
+    solution = solve(expr, 10 ** 12, bounds)
+    assert solution == {"x": 0, "y": 10 ** 12 - 190643}
+    bounds = {"x": range(10 ** 15), "y": range(100)}
+    target = expr.substitute({"x": 12345678, "y": 42})
+    assert solve(expr, target, bounds) == {"x": 12345678, "y": 42}
+    assert solve(expr, 10 ** 12, bounds) is None
+
+
+def test_solve_unbound():
+    with pytest.raises(ValueError):
+        solve(x + y, 1, {"x": range(10)})
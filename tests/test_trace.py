@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+import pytest
+
+from aoc.day5.part1 import INPUT1 as DAY5
+from aoc.util.intcode import IntcodeOperator, OpCode
+from aoc.util.profiler import Profile
+from aoc.util.trace import Step, Trace
+
+# Count down from the input to 0, outputting each value.
+countdown = [3, 12, 4, 12, 1001, 12, -1, 12, 1005, 12, 2, 99, 0]
+
+
+def test_trace_records():
+    program = IntcodeOperator.from_iter(countdown, trace=Trace(16))
+    assert [*program.run(2)] == [2, 1]
+    steps = [*program.trace]
+    assert len(steps) == program.trace.count == 7
+    assert steps[0] == Step(0, 3, 12, 0, 0, 2)
+    assert steps[1] == Step(2, 4, 12, 0, 0, 2)
+    assert steps[2] == Step(4, 1001, 12, -1, 12, 1)
+    assert steps[3] == Step(8, 1005, 12, 2, 0, 2)
+    assert steps[-1] == Step(8, 1005, 12, 2, 0, 11)
+    assert [s.code for s in steps[:4]] == [OpCode.IN, OpCode.OUT, OpCode.ADD, OpCode.JIT]
+
+
+def test_trace_ring_buffer():
+    program = IntcodeOperator.from_iter(countdown, trace=Trace(4))
+    [*program.run(10)]
+    trace = program.trace
+    assert trace.count == 31
+    assert len(trace) == 4
+    assert trace.dropped == 27
+    assert [s.ip for s in trace] == [8, 2, 4, 8]
+    assert [*trace][-1] == Step(8, 1005, 12, 2, 0, 11)
+
+
+@pytest.mark.parametrize(argnames="input", argvalues=[1, 5])
+def test_trace_file(tmp_path, input):
+    path = tmp_path / "day5.trace"
+    plain = IntcodeOperator.from_str(DAY5.read_text())
+    with Trace(1 << 12, path=path) as trace:
+        traced = IntcodeOperator.from_str(DAY5.read_text(), trace=trace)
+        assert [*traced.run(input)] == [*plain.run(input)]
+        expected = [*trace]
+    with Trace.open(path) as reopened:
+        assert reopened.count == len(expected)
+        assert [*reopened] == expected
+
+
+def test_trace_open_invalid(tmp_path):
+    path = tmp_path / "bogus.trace"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        Trace.open(path)
+
+
+def test_trace_big_ints():
+    # Results which don't fit in 64 bits keep their low 64 bits.
+    program = IntcodeOperator.from_iter(
+        [1101, 2 ** 63, 5, 9, 4, 9, 99, 0, 0, 0], trace=Trace(8)
+    )
+    assert [*program.run()] == [2 ** 63 + 5]
+    first, second = [*program.trace]
+    assert first.a == -(2 ** 63)
+    assert first.result == second.result == -(2 ** 63) + 5
+
+
+def test_trace_with_profile():
+    program = IntcodeOperator.from_iter(countdown, trace=Trace(), profile=Profile())
+    [*program.run(3)]
+    assert program.profile.instructions == program.trace.count == 10